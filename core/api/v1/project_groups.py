@@ -1,29 +1,36 @@
 import os
 import shutil
-import pika
-import json
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    HTTPException,
+    UploadFile,
+    File,
+    Depends,
+    Request,
+    Response,
+)
 from psycopg2.extensions import connection
 from pydantic import BaseModel
-import qdrant_client
-from langchain_community.vectorstores import Qdrant
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.prompts import PromptTemplate
+from typing import Optional
 
 
 from core.settings import config
 from core.db import get_db
-from core.crud import crud_project_group
+from core.crud import crud_chat_session, crud_project_group
+from core.services import chat_session, clients, job_queue, vector_store
+from core.services.llm_scheduler import INTERACTIVE
 
 router = APIRouter()
 
-llm = ChatOpenAI(model_name="gpt-4o")
-embeddings = OpenAIEmbeddings()
 DATA_DIR = config["data"]["data_dir"]
+DIGEST_CACHE_MAX_AGE = config.get("digest", {}).get("cache_max_age", 30)
 
 
 class ChatRequest(BaseModel):
     query: str
+    # 지정하면 서버에 저장된 대화 기록을 이어서 사용합니다. (POST /{group_name}/chat/sessions 로 생성)
+    session_id: Optional[str] = None
 
 
 @router.get("/project-groups")
@@ -70,9 +77,15 @@ def delete_project_group_endpoint(group_name: str, conn: connection = Depends(ge
         raise HTTPException(status_code=400, detail="Group name is required")
 
     try:
+        existing_group = crud_project_group.get_project_group_by_name(conn, group_name)
         success = crud_project_group.delete_project_group(conn, group_name)
         if not success:
             raise HTTPException(status_code=404, detail="Group not found")
+        if existing_group:
+            try:
+                vector_store.delete_group(existing_group[0], group_name)
+            except Exception as e:
+                print(f"❌ Failed to delete vectors for group {group_name}: {e}")
         return {"message": f"Project group '{group_name}' deleted successfully."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete group: {str(e)}")
@@ -117,8 +130,9 @@ async def upload_document(
         cur.execute(sql, (group_name,))
         group_id = cur.fetchone()
         print(group_id)
-        sql = "INSERT INTO documents (group_id, file_name) VALUES (%s, %s)"
+        sql = "INSERT INTO documents (group_id, file_name) VALUES (%s, %s) RETURNING id"
         cur.execute(sql, (group_id[0], file.filename))
+        document_id = cur.fetchone()[0]
         conn.commit()
 
         print(f"✅ Document '{file.filename} saved to database.")
@@ -126,28 +140,20 @@ async def upload_document(
         with open(file_path, "wb") as f:
             shutil.copyfileobj(file.file, f)
 
-        connection = pika.BlockingConnection(
-            pika.ConnectionParameters(host=os.getenv("RABBITMQ_HOST", "rabbitmq"))
-        )
-        channel = connection.channel()
-
-        channel.queue_declare(queue="document_queue", durable=True)
+        # 파일 크기 / 페이지 수로 처리 레인을 정해 작은 문서가 큰 문서 뒤에서 기다리지 않게 합니다.
+        file_size = os.path.getsize(file_path)
+        page_count = job_queue.estimate_page_count(file_path)
+        lane = job_queue.choose_lane(file_size, page_count)
         message = {
             "project_group": group_name,
             "file_name": file.filename,
+            "document_id": document_id,
+            "file_size": file_size,
+            "page_count": page_count,
+            "lane": lane,
         }
-
-        channel.basic_publish(
-            exchange="",
-            routing_key="document_queue",
-            body=json.dumps(message),
-            properties=pika.BasicProperties(
-                delivery_mode=2,
-            ),
-        )
-
-        connection.close()
-        print(f"✅ Message sent to RabbitMQ for file: {file.filename}")
+        job_queue.publish_document_job(message, lane)
+        print(f"✅ Message sent to RabbitMQ ({lane} lane) for file: {file.filename}")
 
         return {
             "message": "File uploaded and processing job queued.",
@@ -162,28 +168,65 @@ async def upload_document(
         file.file.close()
 
 
+@router.post("/{group_name}/chat/sessions")
+def create_chat_session(group_name: str, conn: connection = Depends(get_db)):
+    """
+    대화 기록을 서버에 저장하는 채팅 세션을 생성합니다.
+    """
+    group = crud_project_group.get_project_group_by_name(conn, group_name)
+    if not group:
+        raise HTTPException(status_code=404, detail="Project group not found")
+
+    try:
+        session_id = crud_chat_session.create_session(conn, group[0])
+        return {"session_id": session_id}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to create chat session: {str(e)}"
+        )
+
+
 @router.post("/{group_name}/chat")
-async def chat_with_documents(group_name: str, request: ChatRequest):
+def chat_with_documents(
+    group_name: str,
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    conn: connection = Depends(get_db),
+):
+    # LangChain 임포트는 무거우므로 채팅 요청이 처음 들어올 때 로드합니다.
+    from langchain.prompts import PromptTemplate
+
+    group = crud_project_group.get_project_group_by_name(conn, group_name)
+    if not group:
+        raise HTTPException(status_code=404, detail="Project group not found")
+
+    session_id = request.session_id
+    if session_id is not None:
+        session = crud_chat_session.get_session(conn, session_id)
+        if not session or session[1] != group[0]:
+            raise HTTPException(status_code=404, detail="Chat session not found")
+
     try:
-        client = qdrant_client.QdrantClient(host="qdrant", port=6333)
-        qdrant = Qdrant(
-            client=client, collection_name=group_name, embeddings=embeddings
+        summary, recent = (
+            chat_session.load_history(conn, session_id) if session_id else ("", [])
+        )
+        # 후속 질문은 대화 맥락을 반영한 독립적인 질의로 바꿔 검색합니다.
+        search_query = chat_session.condense_query(summary, recent, request.query)
+        retrieved_docs = chat_session.retrieve(
+            conn, session_id, group[0], group_name, search_query
         )
-        retriever = qdrant.as_retriever()
-        retrieved_docs = retriever.invoke(request.query)
 
         # 문서 형식으로 변환
         sources = [
             {
                 "content": doc.page_content,
                 "source": doc.metadata.get("source", "Unknown"),
+                "page": doc.metadata.get("page"),
             }
             for doc in retrieved_docs
         ]
 
-        context_string = "\n\n---\n\n".join(
-            [doc.page_content for doc in retrieved_docs]
-        )
+        context_string = chat_session.build_context(retrieved_docs)
 
         # 프롬프트 정의
         prompt_template = """
@@ -192,23 +235,37 @@ async def chat_with_documents(group_name: str, request: ChatRequest):
         문서:
         {context}
 
+        이전 대화:
+        {history}
+
         질문: {question}
 
         답변:
         """
 
         PROMPT = PromptTemplate(
-            template=prompt_template, input_variables=["context", "question"]
+            template=prompt_template, input_variables=["context", "history", "question"]
         )
 
         # 최종 프롬프트를 완성합니다.
-        final_prompt = PROMPT.format(context=context_string, question=request.query)
+        final_prompt = PROMPT.format(
+            context=context_string,
+            history=chat_session.format_history(summary, recent) or "(없음)",
+            question=request.query,
+        )
 
         # LLM 호출
-        response = llm.invoke(final_prompt)
+        response = clients.invoke_llm(final_prompt, clients.CHAT_MODEL, INTERACTIVE)
         answer = response.content.strip()
 
-        return {"answer": answer, "sources": sources}
+        if session_id:
+            crud_chat_session.add_messages(
+                conn, session_id, [("user", request.query), ("assistant", answer)]
+            )
+            # 기록이 토큰 예산을 넘으면 응답 후에 오래된 메시지를 요약으로 압축합니다.
+            background_tasks.add_task(chat_session.compact_session, session_id)
+
+        return {"answer": answer, "sources": sources, "session_id": session_id}
 
     except Exception as e:
         print(f"An unexpected error occurred in chat API: {e}")
@@ -231,3 +288,39 @@ def get_all_summaries(group_name: str, conn: connection = Depends(get_db)):
 
     formatted_summaries = [{"file_name": s[0], "summary": s[1]} for s in summaries]
     return {"summaries": formatted_summaries}
+
+
+@router.get("/{group_name}/digest")
+def get_group_digest(
+    group_name: str,
+    request: Request,
+    response: Response,
+    conn: connection = Depends(get_db),
+):
+    """
+    워커가 문서 요약으로부터 점진적으로 갱신해 둔 그룹 전체 개요를 반환합니다.
+    ETag 로 변경 여부를 판단하므로 클라이언트는 조건부 요청으로 캐시를 재사용할 수 있습니다.
+    """
+    group_path = os.path.join(DATA_DIR, group_name)
+    if not os.path.exists(group_path):
+        raise HTTPException(status_code=404, detail="Project group not found")
+
+    digest = crud_project_group.get_digest(conn, group_name)
+    if digest is None:
+        raise HTTPException(status_code=404, detail="Digest not found for this group.")
+
+    content, document_count, updated_at = digest
+    etag = f'"{group_name}-{document_count}-{updated_at.timestamp()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={DIGEST_CACHE_MAX_AGE}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return {
+        "digest": content,
+        "document_count": document_count,
+        "updated_at": updated_at.isoformat(),
+    }
@@ -1,7 +1,20 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from core.api.v1 import project_groups
+from core.services import clients
+from core.settings import config
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """설정에 따라 시작 시점에 LLM/Qdrant 클라이언트를 미리 생성합니다."""
+    if config.get("llm", {}).get("warmup_on_startup", False):
+        clients.warm_up_clients()
+    yield
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(project_groups.router, prefix="/api/v1")
 
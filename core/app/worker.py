@@ -1,14 +1,41 @@
 import os
-import pika
 import json
-from langchain_unstructured import UnstructuredLoader
 
 from core.settings import config
 from core.db import get_db
+from core.crud import crud_document
+from core.services import digest_updater, job_queue, mindmap_updater
 from core.services.document_processor import DocumentProcessor
 
 DATA_DIR = config["data"]["data_dir"]
-RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
+# "all": 모든 레인 처리, "small": 작은 문서 전용 (용량 예약, 마인드맵 작업 제외), "large": 큰 문서 전용
+WORKER_LANES = os.getenv("WORKER_LANES", "all")
+LARGE_EVERY = job_queue.QUEUE_CONFIG.get("large_every", 4)
+POLL_INTERVAL = job_queue.QUEUE_CONFIG.get("poll_interval", 1.0)
+# 문서 처리 단계. 각 단계의 완료는 document_stages 테이블에 기록됩니다.
+STAGES = ("rag", "summary", "digest", "mindmap")
+
+def run_stage(processor, stage, file_path, project_group, document_id):
+    if stage == "rag":
+        processor.process_for_rag(file_path, project_group, document_id)
+    elif stage == "summary":
+        processor.process_for_summary(file_path, project_group)
+    elif stage == "digest":
+        group_id = processor.get_group_id(project_group)
+        if group_id is None:
+            raise ValueError(f"Group '{project_group}' not found in database.")
+        digest_updater.update_digest_for_summary(
+            processor.conn, group_id, os.path.basename(file_path)
+        )
+    elif stage == "mindmap":
+        # 마인드맵은 그룹 단위로 모아서 갱신하므로 여기서는 대기 목록에 등록만 합니다.
+        group_id = processor.get_group_id(project_group)
+        if group_id is None:
+            raise ValueError(f"Group '{project_group}' not found in database.")
+        mindmap_updater.enqueue_mindmap_update(
+            processor.conn, group_id, os.path.basename(file_path)
+        )
+
 
 def callback(ch, method, properties, body):
     """메시지 수신 시 실행될 메인 콜백 함수"""
@@ -16,6 +43,7 @@ def callback(ch, method, properties, body):
     document_data = json.loads(body)
     file_name = document_data.get("file_name")
     project_group = document_data.get("project_group")
+    document_id = document_data.get("document_id")
     file_path = os.path.join(DATA_DIR, project_group, file_name)
 
     db_gen = get_db()
@@ -24,36 +52,152 @@ def callback(ch, method, properties, body):
     try:
         processor = DocumentProcessor(conn)
 
-        loader = UnstructuredLoader(file_path, mode="elements")
-        documents = loader.load()
-        full_text = "\n\n".join([d.page_content for d in documents])
+        if document_id is None:
+            document_id = crud_document.get_latest_document_id(
+                conn, project_group, file_name
+            )
+            document_data["document_id"] = document_id
 
-        processor.process_for_rag(file_path, project_group)
-        processor.process_for_summary(file_path, project_group)
-        processor.process_for_mindmap(project_group, full_text)
+        # 재시도된 메시지라면 이미 끝난 단계는 건너뛰고 첫 미완료 단계부터 이어갑니다.
+        completed = (
+            crud_document.get_completed_stages(conn, document_id)
+            if document_id is not None
+            else set()
+        )
+        for stage in STAGES:
+            if stage in completed:
+                print(f"[Worker] Skipping completed stage '{stage}' for {file_path}")
+                continue
+            run_stage(processor, stage, file_path, project_group, document_id)
+            if document_id is not None:
+                crud_document.mark_stage_completed(conn, document_id, stage)
 
         print(f"[Worker] ✅ Successfully processed file: {file_path}")
         ch.basic_ack(delivery_tag=method.delivery_tag)
     except Exception as e:
         print(f"[Worker] ❌ Error processing {file_path}: {e}")
-        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        conn.rollback()
+        document_data["attempt"] = document_data.get("attempt", 0) + 1
+        document_data["last_error"] = str(e)
+        try:
+            if job_queue.publish_retry(ch, document_data):
+                print(f"[Worker] Scheduled retry #{document_data['attempt']} for {file_path}")
+            else:
+                print(f"[Worker] ❌ Moved {file_path} to dead-letter queue")
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+        except Exception as publish_error:
+            print(f"[Worker] ❌ Failed to schedule retry for {file_path}: {publish_error}")
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
     finally:
         if conn:
             conn.close()
 
+def mindmap_callback(ch, method, properties, body):
+    """
+    그룹 마인드맵 갱신 작업을 처리합니다.
+    실패하면 반영할 문서 수를 절반으로 줄여 백오프 후 재시도하고, 재시도를 모두 소진하면
+    그 배치의 문서들을 대기 목록에서 빼 dead-letter 큐로 보낸 뒤 나머지 문서로 새 작업을 예약합니다.
+    """
+    job = json.loads(body)
+    group_id = job.get("group_id")
+    batch_size = job.get("batch_size", mindmap_updater.MAX_DOCUMENTS_PER_MERGE)
+    print(f"\n[Worker] ✅ Received mindmap job for group_id: {group_id}")
+
+    db_gen = get_db()
+    conn = next(db_gen)
+
+    try:
+        try:
+            mindmap_updater.run_mindmap_job(conn, group_id, batch_size)
+        except Exception as e:
+            print(f"[Worker] ❌ Error updating mindmap for group_id {group_id}: {e}")
+            conn.rollback()
+            job["attempt"] = job.get("attempt", 0) + 1
+            job["last_error"] = str(e)
+            job["batch_size"] = max(1, batch_size // 2)
+
+            pending = []
+            if job["attempt"] > len(job_queue.RETRY_DELAYS):
+                # dead-letter 메시지에 반영하지 못한 문서 목록을 남깁니다.
+                pending = mindmap_updater.get_pending_batch(conn, group_id, batch_size)
+                job["file_names"] = [file_name for file_name, _ in pending]
+            else:
+                mindmap_updater.reserve_mindmap_job(conn, group_id)
+
+            if job_queue.publish_mindmap_retry(ch, job):
+                print(
+                    f"[Worker] Scheduled mindmap retry #{job['attempt']} for group_id "
+                    f"{group_id} with {job['batch_size']} document(s)"
+                )
+            else:
+                mindmap_updater.remove_pending(conn, group_id, pending)
+                print(
+                    f"[Worker] ❌ Moved mindmap job for group_id {group_id} "
+                    f"({len(pending)} document(s)) to dead-letter queue"
+                )
+                mindmap_updater.schedule_mindmap_job(conn, group_id)
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+    except Exception as e:
+        print(f"[Worker] ❌ Failed to reschedule mindmap job for group_id {group_id}: {e}")
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+    finally:
+        if conn:
+            conn.close()
+
+def lane_order(lanes, small_streak):
+    """
+    이번에 확인할 큐 순서를 반환합니다.
+    small 레인을 우선하되, 작은 문서를 LARGE_EVERY 건 연속 처리했다면 large 레인을 먼저 확인해
+    큰 문서가 무한정 밀리지 않도록 합니다.
+    """
+    # small 전용 워커는 작은 문서 처리 용량을 예약한 것이므로, 오래 걸리고 그룹 잠금을 기다릴 수 있는
+    # 마인드맵 작업은 all / large 워커에게 맡기고 small 레인만 확인합니다.
+    if lanes == "small":
+        return [job_queue.SMALL_QUEUE]
+    # 마인드맵 작업은 이미 debounce 를 거쳐 모인 것이므로 먼저 처리합니다.
+    if lanes == "large":
+        return [job_queue.MINDMAP_QUEUE, job_queue.LARGE_QUEUE, job_queue.LEGACY_QUEUE]
+    if small_streak >= LARGE_EVERY:
+        return [
+            job_queue.MINDMAP_QUEUE,
+            job_queue.LARGE_QUEUE,
+            job_queue.SMALL_QUEUE,
+            job_queue.LEGACY_QUEUE,
+        ]
+    return [
+        job_queue.MINDMAP_QUEUE,
+        job_queue.SMALL_QUEUE,
+        job_queue.LARGE_QUEUE,
+        job_queue.LEGACY_QUEUE,
+    ]
+
+
 def main():
     """RabbitMQ 연결 및 소비 시작"""
-    connection = pika.BlockingConnection(
-        pika.ConnectionParameters(
-            host=RABBITMQ_HOST, heartbeat=600, blocked_connection_timeout=300
-        )
+    connection = job_queue.get_connection(
+        heartbeat=600, blocked_connection_timeout=300
     )
     channel = connection.channel()
-    channel.queue_declare(queue="document_queue", durable=True)
-    channel.basic_qos(prefetch_count=1)
-    channel.basic_consume(queue="document_queue", on_message_callback=callback)
-    print("✅ RabbitMQ Worker is waiting for messages...")
-    channel.start_consuming()
+    job_queue.declare_queues(channel)
+    print(f"✅ RabbitMQ Worker ({WORKER_LANES} lanes) is waiting for messages...")
+
+    small_streak = 0
+    while True:
+        for queue in lane_order(WORKER_LANES, small_streak):
+            method, properties, body = channel.basic_get(queue=queue)
+            if method is None:
+                continue
+            if queue == job_queue.MINDMAP_QUEUE:
+                mindmap_callback(channel, method, properties, body)
+                break
+            callback(channel, method, properties, body)
+            small_streak = small_streak + 1 if queue == job_queue.SMALL_QUEUE else 0
+            break
+        else:
+            # 모든 큐가 비어 있으면 잠시 대기하면서 heartbeat 를 처리합니다.
+            small_streak = 0
+            connection.process_data_events(time_limit=POLL_INTERVAL)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,130 @@
+import json
+import uuid
+from psycopg2.extensions import connection
+
+
+def create_session(conn: connection, group_id: int):
+    """새 채팅 세션을 생성하고 세션 ID를 반환합니다."""
+    session_id = uuid.uuid4().hex
+    cur = conn.cursor()
+    try:
+        sql = "INSERT INTO chat_sessions (id, group_id) VALUES (%s, %s)"
+        cur.execute(sql, (session_id, group_id))
+        conn.commit()
+        return session_id
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+
+def get_session(conn: connection, session_id: str):
+    """세션의 (id, group_id, summary)를 조회합니다."""
+    cur = conn.cursor()
+    try:
+        sql = "SELECT id, group_id, summary FROM chat_sessions WHERE id = %s"
+        cur.execute(sql, (session_id,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+
+
+def lock_session(conn: connection, namespace: int, session_id: str):
+    """트랜잭션이 끝날 때까지 세션 단위 advisory lock 을 잡습니다."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT pg_advisory_xact_lock(%s, hashtext(%s))", (namespace, session_id)
+        )
+    finally:
+        cur.close()
+
+
+def get_active_messages(conn: connection, session_id: str):
+    """아직 요약에 반영(compact)되지 않은 메시지들을 (id, role, content) 로 오래된 순으로 조회합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            SELECT id, role, content FROM chat_messages
+            WHERE session_id = %s AND NOT compacted
+            ORDER BY id
+            """
+        cur.execute(sql, (session_id,))
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def add_messages(conn: connection, session_id: str, messages: list):
+    """(role, content) 메시지들을 세션에 추가합니다."""
+    cur = conn.cursor()
+    try:
+        sql = "INSERT INTO chat_messages (session_id, role, content) VALUES (%s, %s, %s)"
+        for role, content in messages:
+            cur.execute(sql, (session_id, role, content))
+        cur.execute(
+            "UPDATE chat_sessions SET updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+            (session_id,),
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+
+def compact_messages(conn: connection, session_id: str, summary: str, message_ids: list):
+    """세션 요약을 갱신하고, 요약에 반영된 메시지들을 compacted 로 표시합니다."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "UPDATE chat_sessions SET summary = %s WHERE id = %s", (summary, session_id)
+        )
+        cur.execute(
+            "UPDATE chat_messages SET compacted = TRUE WHERE session_id = %s AND id = ANY(%s)",
+            (session_id, message_ids),
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+
+def get_cached_retrieval(conn: connection, session_id: str, query_hash: str, ttl_seconds: int):
+    """ttl 안에 같은 질의로 검색한 청크 ID 목록을 조회합니다. 없으면 None 을 반환합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            SELECT point_ids FROM chat_retrievals
+            WHERE session_id = %s AND query_hash = %s
+              AND created_at > CURRENT_TIMESTAMP - make_interval(secs => %s)
+            """
+        cur.execute(sql, (session_id, query_hash, ttl_seconds))
+        result = cur.fetchone()
+        return result[0] if result else None
+    finally:
+        cur.close()
+
+
+def save_retrieval(conn: connection, session_id: str, query_hash: str, point_ids: list):
+    """질의로 검색한 청크 ID 목록을 세션에 저장합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            INSERT INTO chat_retrievals (session_id, query_hash, point_ids)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (session_id, query_hash) DO UPDATE SET
+                point_ids = EXCLUDED.point_ids,
+                created_at = CURRENT_TIMESTAMP
+            """
+        cur.execute(sql, (session_id, query_hash, json.dumps(point_ids)))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
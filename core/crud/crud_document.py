@@ -0,0 +1,46 @@
+from psycopg2.extensions import connection
+
+
+def get_latest_document_id(conn: connection, group_name: str, file_name: str):
+    """그룹과 파일 이름으로 가장 최근에 등록된 문서 ID를 조회합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            SELECT d.id FROM documents d
+            JOIN project_groups g ON g.id = d.group_id
+            WHERE g.group_name = %s AND d.file_name = %s
+            ORDER BY d.id DESC LIMIT 1
+            """
+        cur.execute(sql, (group_name, file_name))
+        result = cur.fetchone()
+        return result[0] if result else None
+    finally:
+        cur.close()
+
+
+def get_completed_stages(conn: connection, document_id: int) -> set:
+    """문서에 대해 완료된 처리 단계 이름을 조회합니다."""
+    cur = conn.cursor()
+    try:
+        sql = "SELECT stage FROM document_stages WHERE document_id = %s"
+        cur.execute(sql, (document_id,))
+        return {row[0] for row in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+def mark_stage_completed(conn: connection, document_id: int, stage: str):
+    """처리 단계 완료를 기록합니다. 이미 기록된 단계는 무시합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            INSERT INTO document_stages (document_id, stage) VALUES (%s, %s)
+            ON CONFLICT (document_id, stage) DO NOTHING
+            """
+        cur.execute(sql, (document_id, stage))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
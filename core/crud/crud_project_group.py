@@ -94,3 +94,25 @@ def get_summaries(conn: connection, group_name: str):
         return []
     finally:
         cur.close()
+
+
+def get_digest(conn: connection, group_name: str):
+    """프로젝트 그룹의 개요(digest 트리의 루트 노드)를 조회합니다."""
+    cur = conn.cursor()
+    try:
+        sql = "SELECT id FROM project_groups WHERE group_name = %s"
+        cur.execute(sql, (group_name,))
+        group_id_result = cur.fetchone()
+
+        if group_id_result:
+            group_id = group_id_result[0]
+            sql = """
+                SELECT content, leaf_count, updated_at FROM group_digest_nodes
+                WHERE group_id = %s AND position = 0
+                ORDER BY level DESC LIMIT 1
+                """
+            cur.execute(sql, (group_id,))
+            return cur.fetchone()
+        return None
+    finally:
+        cur.close()
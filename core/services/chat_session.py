@@ -0,0 +1,190 @@
+"""
+서버 측 채팅 세션 관리.
+
+- 세션 기록은 토큰 예산(chat.history_token_budget)을 넘으면 오래된 메시지를 롤링 요약으로 압축합니다.
+- 후속 질문은 대화 맥락을 반영한 독립적인 검색 질의로 재작성(condense)합니다.
+- 세션 안에서 같은 검색 질의가 반복되면 캐시된 청크 ID로 포인트를 바로 가져와
+  임베딩 호출과 벡터 검색을 생략합니다. 프롬프트에는 항상 검색된 청크의 원문을 넣습니다.
+"""
+import hashlib
+
+from core.crud import crud_chat_session
+from core.db import get_db
+from core.services import clients, vector_store
+from core.services.llm_scheduler import INTERACTIVE, estimate_tokens
+from core.settings import config
+
+CHAT_CONFIG = config.get("chat", {})
+HISTORY_TOKEN_BUDGET = CHAT_CONFIG.get("history_token_budget", 2000)
+KEEP_RECENT_MESSAGES = CHAT_CONFIG.get("keep_recent_messages", 4)
+RETRIEVAL_CACHE_TTL = CHAT_CONFIG.get("retrieval_cache_ttl", 600)
+# pg_advisory_xact_lock(namespace, hashtext(session_id)) 의 namespace (마인드맵은 1, 개요는 2)
+CHAT_LOCK_NAMESPACE = 3
+
+
+def load_history(conn, session_id: str):
+    """
+    세션 요약과, 요약을 포함해 토큰 예산 안에 들어가는 최근 메시지들을 반환합니다.
+    압축이 아직 끝나지 않았더라도 프롬프트 크기가 예산을 넘지 않도록 오래된 메시지부터 제외합니다.
+    """
+    session = crud_chat_session.get_session(conn, session_id)
+    summary = session[2] if session else ""
+    budget = HISTORY_TOKEN_BUDGET - estimate_tokens(summary)
+
+    recent = []
+    for _, role, content in reversed(crud_chat_session.get_active_messages(conn, session_id)):
+        budget -= estimate_tokens(content)
+        if budget < 0:
+            break
+        recent.append((role, content))
+    recent.reverse()
+    return summary, recent
+
+
+def format_history(summary: str, recent: list) -> str:
+    lines = []
+    if summary:
+        lines.append(f"[이전 대화 요약]\n{summary}")
+    for role, content in recent:
+        speaker = "사용자" if role == "user" else "AI"
+        lines.append(f"{speaker}: {content}")
+    return "\n".join(lines)
+
+
+def condense_query(summary: str, recent: list, query: str) -> str:
+    """대화 맥락이 있으면 후속 질문을 그 자체로 이해되는 검색 질의로 재작성합니다."""
+    if not summary and not recent:
+        return query
+
+    response = clients.invoke_llm(
+        [
+            {
+                "role": "system",
+                "content": "당신은 대화 맥락을 참고하여 후속 질문을 문서 검색에 적합한 독립적인 질문으로 바꾸는 AI입니다. 재작성한 질문만 출력하세요.",
+            },
+            {
+                "role": "user",
+                "content": f"대화 기록:\n{format_history(summary, recent)}\n\n후속 질문: {query}\n\n독립적인 질문:",
+            },
+        ],
+        clients.SUMMARY_MODEL,
+        INTERACTIVE,
+    )
+    return response.content.strip() or query
+
+
+def _documents_from_points(points: list) -> list:
+    from langchain_core.documents import Document
+
+    documents = []
+    for point in points:
+        payload = point.payload or {}
+        metadata = dict(payload.get("metadata") or {})
+        metadata["_id"] = point.id
+        documents.append(
+            Document(page_content=payload.get("page_content", ""), metadata=metadata)
+        )
+    return documents
+
+
+def query_hash(query: str) -> str:
+    """공백과 대소문자 차이를 무시한 검색 질의의 해시를 반환합니다."""
+    return hashlib.sha256(" ".join(query.split()).lower().encode("utf-8")).hexdigest()
+
+
+def retrieve(conn, session_id, group_id: int, group_name: str, query: str) -> list:
+    """
+    질의와 관련된 청크를 검색합니다. 세션 안에서 같은 질의를 검색한 적이 있으면
+    캐시된 청크 ID로 포인트를 직접 조회해 임베딩 호출과 벡터 검색을 생략합니다.
+    """
+    retriever = vector_store.get_retriever(group_id, group_name)
+    if session_id is None:
+        return retriever.invoke(query)
+
+    key = query_hash(query)
+    point_ids = crud_chat_session.get_cached_retrieval(
+        conn, session_id, key, RETRIEVAL_CACHE_TTL
+    )
+    if point_ids:
+        points = clients.get_qdrant_client().retrieve(
+            collection_name=vector_store.collection_name_for(group_name),
+            ids=point_ids,
+            with_payload=True,
+        )
+        # 문서가 삭제되는 등으로 일부 포인트가 없으면 캐시를 쓰지 않고 다시 검색합니다.
+        if len(points) == len(point_ids):
+            # retrieve 는 순서를 보장하지 않으므로 검색 당시의 순위로 정렬합니다.
+            rank = {str(point_id): i for i, point_id in enumerate(point_ids)}
+            points.sort(key=lambda point: rank[str(point.id)])
+            return _documents_from_points(points)
+
+    documents = retriever.invoke(query)
+    crud_chat_session.save_retrieval(
+        conn,
+        session_id,
+        key,
+        [doc.metadata["_id"] for doc in documents if "_id" in doc.metadata],
+    )
+    return documents
+
+
+def build_context(documents: list) -> str:
+    """
+    검색된 청크들의 원문으로 프롬프트의 문서 영역을 만듭니다.
+    대화 기록에는 질문과 답변만 저장되므로, 이전 턴에 보여준 청크라도 원문을 다시 넣습니다.
+    """
+    return "\n\n---\n\n".join(doc.page_content for doc in documents)
+
+
+def compact_session(session_id: str):
+    """
+    세션 기록이 토큰 예산을 넘으면 최근 KEEP_RECENT_MESSAGES 개를 제외한 메시지를
+    기존 요약과 합쳐 새 요약으로 압축합니다. 응답 후 백그라운드에서 실행됩니다.
+    연속된 요청으로 여러 압축이 동시에 실행될 수 있으므로, 세션 잠금을 잡은 뒤 요약과 메시지를 읽고
+    compact_messages 의 커밋까지 잠금을 유지해 같은 메시지가 두 번 요약되거나 요약이 덮어써지지 않게 합니다.
+    """
+    db_gen = get_db()
+    conn = next(db_gen)
+    try:
+        crud_chat_session.lock_session(conn, CHAT_LOCK_NAMESPACE, session_id)
+        session = crud_chat_session.get_session(conn, session_id)
+        if session is None:
+            return
+        summary = session[2]
+        messages = crud_chat_session.get_active_messages(conn, session_id)
+        total = estimate_tokens(summary) + sum(
+            estimate_tokens(content) for _, _, content in messages
+        )
+        if total <= HISTORY_TOKEN_BUDGET or len(messages) <= KEEP_RECENT_MESSAGES:
+            return
+
+        old_messages = messages[: len(messages) - KEEP_RECENT_MESSAGES]
+        response = clients.invoke_llm(
+            [
+                {
+                    "role": "system",
+                    "content": "당신은 대화 내용을 간결하게 요약하는 AI입니다. 이후 대화에 필요한 사실, 사용자의 관심사, 결론을 유지하세요.",
+                },
+                {
+                    "role": "user",
+                    "content": format_history(
+                        summary, [(role, content) for _, role, content in old_messages]
+                    )
+                    + "\n\n위 대화를 하나의 요약으로 정리해줘.",
+                },
+            ],
+            clients.SUMMARY_MODEL,
+        )
+        crud_chat_session.compact_messages(
+            conn,
+            session_id,
+            response.content.strip(),
+            [message_id for message_id, _, _ in old_messages],
+        )
+        print(f"[Chat] Compacted {len(old_messages)} messages for session {session_id}")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error compacting chat session {session_id}: {e}")
+    finally:
+        # 압축하지 않고 반환한 경우에도 트랜잭션을 끝내 잠금을 해제합니다.
+        conn.close()
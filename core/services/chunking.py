@@ -0,0 +1,112 @@
+"""
+문서 요소 스트림을 RAG 청크 스트림으로 변환합니다.
+
+전체 문서를 한 문자열로 합치지 않고, WINDOW_SIZE 정도의 텍스트 버퍼만 유지하면서
+RecursiveCharacterTextSplitter 로 문서 전체를 한 번에 분할한 것과 같은 청크를 만들어냅니다.
+
+분할기는 먼저 텍스트를 "\\n\\n" 구분자 기준 조각(piece)으로 나누고, chunk_size 보다 작은 조각들을
+앞에서부터 탐욕적으로 합치며(겹침 유지), 큰 조각은 따로 재귀 분할합니다.
+버퍼를 분할할 때 작은 조각들의 합치기를 같은 규칙으로 따라가 보면, 버퍼 끝에서 아직 완성되지 않은
+청크가 어느 조각 경계(구분자 포함)에서 시작하는지 알 수 있습니다. 그 위치부터를 다음 버퍼로 넘기면
+이후의 분할 결과가 문서 전체를 한 번에 분할한 것과 같습니다.
+"""
+import bisect
+import re
+
+from core.settings import config
+
+RAG_CONFIG = config.get("rag", {})
+CHUNK_SIZE = RAG_CONFIG.get("chunk_size", 1000)
+CHUNK_OVERLAP = RAG_CONFIG.get("chunk_overlap", 200)
+# 한 번에 분할하는 텍스트 창의 크기 (청크 개수 기준)
+WINDOW_SIZE = CHUNK_SIZE * RAG_CONFIG.get("window_chunks", 8)
+
+SEGMENT_SEPARATOR = "\n\n"
+SEPARATORS = [SEGMENT_SEPARATOR, "\n"]
+
+
+def make_splitter(chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=SEPARATORS,
+        add_start_index=True,
+    )
+
+
+def _pieces(text: str) -> list:
+    """분할기가 최상위에서 나누는 조각들의 (시작 위치, 길이) 목록을 반환합니다. (구분자는 뒤 조각의 앞에 붙습니다)"""
+    bounds = [0] + [
+        match.start() for match in re.finditer(re.escape(SEGMENT_SEPARATOR), text)
+    ]
+    bounds.append(len(text))
+    return [
+        (start, end - start) for start, end in zip(bounds, bounds[1:]) if end > start
+    ]
+
+
+def _carry_start(splitter, text: str) -> int:
+    """
+    다음 버퍼로 넘길 위치를 반환합니다.
+    마지막 큰 조각 뒤의 작은 조각들을 분할기와 같은 규칙으로 합쳐 보고, 끝까지 남은 청크가
+    시작하는 조각의 위치를 돌려줍니다. 마지막 조각이 큰 조각이면 len(text) 입니다.
+    """
+    chunk_size, chunk_overlap = splitter._chunk_size, splitter._chunk_overlap
+    current = []
+    total = 0
+    for start, length in _pieces(text):
+        if length >= chunk_size:
+            current, total = [], 0
+            continue
+        if total + length > chunk_size and current:
+            while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                total -= current.pop(0)[1]
+        current.append((start, length))
+        total += length
+    return current[0][0] if current else len(text)
+
+
+def _split_buffer(splitter, text: str, segments: list, final: bool):
+    """
+    버퍼를 분할해 확정된 (청크, 페이지)를 내보내고, 다음 버퍼로 넘길 (텍스트, 세그먼트)를 반환합니다.
+    segments 는 버퍼 안에서 각 요소가 시작하는 (위치, 페이지) 목록입니다.
+    """
+    chunks = splitter.create_documents([text])
+    cut = len(text) if final else _carry_start(splitter, text)
+    if cut < len(text) and text[cut:].strip() and chunks:
+        # 넘기는 텍스트에서 나온 마지막 청크는 다음 버퍼에서 다시 만들어집니다.
+        chunks.pop()
+
+    starts = [start for start, _ in segments]
+    for chunk in chunks:
+        index = max(0, bisect.bisect_right(starts, chunk.metadata["start_index"]) - 1)
+        yield chunk.page_content, segments[index][1]
+
+    index = max(0, bisect.bisect_right(starts, cut) - 1)
+    rest = [(max(0, start - cut), page) for start, page in segments[index:]]
+    return text[cut:], rest
+
+
+def iter_chunks(elements, splitter=None, window_size: int = WINDOW_SIZE):
+    """
+    문서 요소 스트림을 (청크 텍스트, 페이지 번호) 스트림으로 변환합니다.
+    결과는 앞뒤 공백을 제거한 요소 텍스트를 "\\n\\n" 으로 이어 붙여 한 번에 분할한 것과 같습니다.
+    """
+    splitter = splitter or make_splitter()
+    text = ""
+    segments = []
+    for element in elements:
+        content = element.page_content.strip()
+        if not content:
+            continue
+        if segments:
+            text += SEGMENT_SEPARATOR
+        segments.append((len(text), element.metadata.get("page_number")))
+        text += content
+        if len(text) >= window_size:
+            text, segments = yield from _split_buffer(splitter, text, segments, False)
+
+    if text.strip():
+        yield from _split_buffer(splitter, text, segments, True)
@@ -0,0 +1,78 @@
+"""
+LLM / 임베딩 / Qdrant 클라이언트를 생성하는 공용 팩토리.
+
+LangChain, qdrant-client 임포트는 무겁기 때문에 모듈 로드 시점이 아니라
+클라이언트가 처음 필요할 때 임포트하고, 생성된 객체는 프로세스 안에서 재사용합니다.
+"""
+from functools import lru_cache
+
+from core.services.llm_scheduler import (
+    BACKGROUND,
+    SCHEDULER_CONFIG,
+    estimate_tokens,
+    get_scheduler,
+)
+from core.settings import config
+
+LLM_CONFIG = config.get("llm", {})
+QDRANT_CONFIG = config.get("qdrant", {})
+
+CHAT_MODEL = LLM_CONFIG.get("chat_model", "gpt-4o")
+SUMMARY_MODEL = LLM_CONFIG.get("summary_model", "gpt-3.5-turbo")
+
+
+@lru_cache(maxsize=None)
+def get_llm(model_name: str = CHAT_MODEL):
+    """모델 이름별로 ChatOpenAI 인스턴스를 하나씩 생성해 재사용합니다."""
+    from langchain_openai import ChatOpenAI
+
+    # 재시도는 LLMScheduler 가 담당합니다.
+    return ChatOpenAI(model=model_name, max_retries=0)
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(priority: int = BACKGROUND):
+    """
+    우선순위별로 스케줄러를 거치는 OpenAIEmbeddings 래퍼를 생성해 재사용합니다.
+    """
+    from langchain_openai import OpenAIEmbeddings
+    from core.services.scheduled_embeddings import ScheduledEmbeddings
+
+    embeddings = OpenAIEmbeddings(max_retries=0)
+    return ScheduledEmbeddings(embeddings, embeddings.model, priority)
+
+
+def invoke_llm(messages, model_name: str = CHAT_MODEL, priority: int = BACKGROUND, **kwargs):
+    """
+    스케줄러를 통해 LLM 을 호출합니다. rate limit 대기와 재시도는 스케줄러가 처리합니다.
+    """
+    llm = get_llm(model_name)
+    tokens = estimate_tokens(messages) + SCHEDULER_CONFIG.get(
+        "default_output_tokens", 512
+    )
+    return get_scheduler().run(
+        model_name,
+        lambda: llm.invoke(messages, **kwargs),
+        priority=priority,
+        tokens=tokens,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_qdrant_client():
+    """Qdrant 클라이언트를 생성해 재사용합니다."""
+    import qdrant_client
+
+    return qdrant_client.QdrantClient(
+        host=QDRANT_CONFIG.get("host", "qdrant"),
+        port=QDRANT_CONFIG.get("port", 6333),
+    )
+
+
+def warm_up_clients():
+    """앱 시작 시점에 클라이언트를 미리 생성합니다. (첫 요청 지연 제거용)"""
+    from core.services.llm_scheduler import INTERACTIVE
+
+    get_llm(CHAT_MODEL)
+    get_embeddings(INTERACTIVE)
+    get_qdrant_client()
@@ -0,0 +1,169 @@
+"""
+그룹 전체 개요(digest)를 문서 요약들로부터 점진적으로 유지합니다.
+
+요약(summaries)을 id 순으로 나열한 것을 잎으로 하는 fanout 진 트리를 group_digest_nodes 에 저장합니다.
+level 1 노드는 요약 fanout 개를, level k 노드는 level k-1 노드 fanout 개를 하나로 통합하며,
+노드가 하나뿐인 최상위 level 의 노드가 그룹 개요입니다.
+
+새 요약이 추가되면 그 요약이 속한 가지(잎에서 루트까지의 경로)만 다시 계산합니다.
+각 노드는 입력의 해시(fingerprint)를 저장해 입력이 바뀌지 않은 노드는 LLM 을 호출하지 않습니다.
+"""
+import hashlib
+import math
+
+from core.services import clients
+from core.settings import config
+
+DIGEST_CONFIG = config.get("digest", {})
+FANOUT = max(2, DIGEST_CONFIG.get("fanout", 8))
+
+# pg_advisory_xact_lock(namespace, group_id) 의 namespace (마인드맵은 1)
+DIGEST_LOCK_NAMESPACE = 2
+
+
+def _fingerprint(texts: list) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _merge(texts: list) -> str:
+    """여러 요약(또는 부분 개요)을 하나의 개요로 통합합니다."""
+    joined = "\n\n---\n\n".join(texts)
+    response = clients.invoke_llm(
+        [
+            {
+                "role": "system",
+                "content": "당신은 여러 문서의 요약을 하나의 체계적인 개요로 통합하는 AI입니다.",
+            },
+            {
+                "role": "user",
+                "content": "다음은 같은 프로젝트 그룹에 속한 문서(또는 문서 묶음)들의 요약입니다. "
+                "중복을 제거하고, 공통 주제와 각 문서의 핵심 내용이 드러나도록 하나의 개요로 정리해줘."
+                f"\n\n{joined}",
+            },
+        ],
+        clients.SUMMARY_MODEL,
+    )
+    return response.content.strip()
+
+
+def _update_node(cur, group_id, level, position, texts, leaf_count) -> bool:
+    """입력이 바뀐 경우에만 노드를 다시 계산해 저장하고, 변경 여부를 반환합니다."""
+    fingerprint = _fingerprint(texts)
+    cur.execute(
+        """
+        SELECT fingerprint FROM group_digest_nodes
+        WHERE group_id = %s AND level = %s AND position = %s
+        """,
+        (group_id, level, position),
+    )
+    existing = cur.fetchone()
+    if existing and existing[0] == fingerprint:
+        return False
+
+    # 자식이 하나뿐이면 LLM 호출 없이 그대로 올립니다.
+    content = texts[0] if len(texts) == 1 else _merge(texts)
+    cur.execute(
+        """
+        INSERT INTO group_digest_nodes
+            (group_id, level, position, content, leaf_count, fingerprint)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (group_id, level, position) DO UPDATE SET
+            content = EXCLUDED.content,
+            leaf_count = EXCLUDED.leaf_count,
+            fingerprint = EXCLUDED.fingerprint,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (group_id, level, position, content, leaf_count, fingerprint),
+    )
+    return True
+
+
+def update_digest_for_summary(conn, group_id: int, file_name: str):
+    """
+    file_name 의 요약이 추가/변경되었을 때 해당 가지의 노드들만 다시 계산합니다.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT pg_advisory_xact_lock(%s, %s)", (DIGEST_LOCK_NAMESPACE, group_id)
+        )
+        cur.execute(
+            "SELECT id FROM summaries WHERE group_id = %s AND file_name = %s",
+            (group_id, file_name),
+        )
+        summary = cur.fetchone()
+        if summary is None:
+            conn.commit()
+            return
+
+        cur.execute(
+            "SELECT COUNT(*) FROM summaries WHERE group_id = %s AND id < %s",
+            (group_id, summary[0]),
+        )
+        rank = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*) FROM summaries WHERE group_id = %s", (group_id,))
+        total = cur.fetchone()[0]
+
+        # 요약이 id 순서와 다르게 커밋될 수 있어, 이 요약 뒤의 잎 노드들도 다시 확인합니다.
+        # (입력이 그대로인 노드는 fingerprint 비교로 건너뜁니다.)
+        start = (rank // FANOUT) * FANOUT
+        cur.execute(
+            """
+            SELECT file_name, summary FROM summaries
+            WHERE group_id = %s ORDER BY id OFFSET %s
+            """,
+            (group_id, start),
+        )
+        leaves = [f"[{name}]\n{text}" for name, text in cur.fetchall()]
+
+        level = 1
+        changed = set()
+        for i in range(0, len(leaves), FANOUT):
+            position = (start + i) // FANOUT
+            texts = leaves[i : i + FANOUT]
+            if _update_node(cur, group_id, level, position, texts, len(texts)):
+                changed.add(position)
+
+        node_count = math.ceil(total / FANOUT)
+        while node_count > 1:
+            parents = sorted({position // FANOUT for position in changed})
+            level += 1
+            changed = set()
+            for parent in parents:
+                cur.execute(
+                    """
+                    SELECT content, leaf_count FROM group_digest_nodes
+                    WHERE group_id = %s AND level = %s
+                      AND position >= %s AND position < %s
+                    ORDER BY position
+                    """,
+                    (group_id, level - 1, parent * FANOUT, (parent + 1) * FANOUT),
+                )
+                children = cur.fetchall()
+                if _update_node(
+                    cur,
+                    group_id,
+                    level,
+                    parent,
+                    [content for content, _ in children],
+                    sum(leaf_count for _, leaf_count in children),
+                ):
+                    changed.add(parent)
+            node_count = math.ceil(node_count / FANOUT)
+
+        # 트리 높이가 낮아졌다면 남아 있는 상위 노드를 정리합니다.
+        cur.execute(
+            "DELETE FROM group_digest_nodes WHERE group_id = %s AND level > %s",
+            (group_id, level),
+        )
+        conn.commit()
+        print(f"[Digest] Updated group digest for group_id: {group_id} (levels: {level})")
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
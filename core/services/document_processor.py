@@ -1,17 +1,18 @@
 import os
 import json
-from langchain_unstructured import UnstructuredLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import Qdrant
+import uuid
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from psycopg2.extras import RealDictCursor
 
 from core.settings import config
+from core.services import clients, vector_store
+from core.services.chunking import iter_chunks
 
-openai_client = ChatOpenAI(model="gpt-3.5-turbo")
-embeddings = OpenAIEmbeddings()
+RAG_CONFIG = config.get("rag", {})
+EMBEDDING_BATCH_SIZE = RAG_CONFIG.get("embedding_batch_size", 64)
+# 요약 시 LLM 에 전달하는 최대 문자 수 (모델 컨텍스트 길이에 맞춰 조정)
+SUMMARY_MAX_INPUT_CHARS = config.get("summary", {}).get("max_input_chars", 48000)
 
 
 class MindMapNode(BaseModel):
@@ -31,31 +32,97 @@ class DocumentProcessor:
     def __init__(self, db_connection):
         self.conn = db_connection
 
-    def process_for_rag(self, file_path: str, project_group: str):
+    def iter_elements(self, file_path: str):
+        """
+        Unstructured로 문서를 요소(element) 단위로 파싱해 하나씩 반환합니다.
+        """
+        from langchain_unstructured import UnstructuredLoader
+
+        loader = UnstructuredLoader(file_path, mode="elements")
+        return loader.lazy_load()
+
+    def load_text(self, file_path: str, max_chars: Optional[int] = None) -> str:
+        """
+        Unstructured로 문서를 파싱하여 텍스트를 반환합니다.
+        max_chars 를 지정하면 그 길이에 도달한 뒤의 요소는 읽지 않습니다.
+        """
+        texts = []
+        length = 0
+        for element in self.iter_elements(file_path):
+            texts.append(element.page_content)
+            length += len(element.page_content) + 2
+            if max_chars is not None and length >= max_chars:
+                break
+        full_text = "\n\n".join(texts)
+        return full_text[:max_chars] if max_chars is not None else full_text
+
+    def get_group_id(self, project_group: str):
+        """그룹 이름으로 그룹 ID를 조회합니다. 없으면 None 을 반환합니다."""
+        cur = self.conn.cursor()
+        try:
+            sql = "SELECT id FROM project_groups WHERE group_name = %s"
+            cur.execute(sql, (project_group,))
+            result = cur.fetchone()
+            return result[0] if result else None
+        finally:
+            cur.close()
+
+    def process_for_rag(
+        self, file_path: str, project_group: str, document_id: Optional[int] = None
+    ):
         """
         Unstructured를 사용하여 문서를 처리하고 Qdrant에 저장합니다.
+        각 청크에는 그룹 ID, 문서 ID, 파일 이름, 페이지 번호, 청크 순번이 메타데이터로 저장됩니다.
         """
         print(f"[RAG] Processing started for {file_path}")
-        loader = UnstructuredLoader(file_path, mode="elements")
-        documents = loader.load()
-        full_text = "\n\n".join([d.page_content for d in documents])
+        file_name = os.path.basename(file_path)
+        group_id = self.get_group_id(project_group)
+        if group_id is None:
+            raise ValueError(f"Group '{project_group}' not found in database.")
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n"],
-        )
-        split_docs = text_splitter.split_text(full_text)
-
-        Qdrant.from_texts(
-            split_docs,
-            embeddings,
-            host="qdrant",
-            port=6333,
-            collection_name=project_group,
+        # 재시도 시 같은 포인트를 덮어쓰도록 문서와 청크 순번으로 포인트 ID를 고정합니다.
+        document_key = (
+            document_id if document_id is not None else f"{project_group}/{file_name}"
         )
+
+        def group_exists():
+            # 처리 중에 그룹이 삭제(되거나 같은 이름으로 다시 생성)되었다면 청크를 저장하지 않습니다.
+            return self.get_group_id(project_group) == group_id
+
+        # 요소 -> 청크 -> 임베딩 배치 -> upsert 를 스트리밍으로 처리해
+        # 메모리 사용량이 문서 크기가 아니라 배치 크기에 비례하도록 합니다.
+        texts, metadatas, ids = [], [], []
+        chunk_count = 0
+        for chunk_index, (text, page) in enumerate(
+            iter_chunks(self.iter_elements(file_path))
+        ):
+            texts.append(text)
+            metadatas.append(
+                {
+                    "source": file_name,
+                    "group_id": group_id,
+                    "document_id": document_id,
+                    "page": page,
+                    "chunk_index": chunk_index,
+                }
+            )
+            ids.append(
+                str(uuid.uuid5(uuid.NAMESPACE_URL, f"autobrief:{document_key}:{chunk_index}"))
+            )
+            if len(texts) >= EMBEDDING_BATCH_SIZE:
+                vector_store.add_chunks(
+                    project_group, texts, metadatas, ids, group_exists
+                )
+                chunk_count += len(texts)
+                texts, metadatas, ids = [], [], []
+
+        if texts:
+            vector_store.add_chunks(project_group, texts, metadatas, ids, group_exists)
+            chunk_count += len(texts)
+
         print(
-            f"[RAG] Successfully stored {len(split_docs)} chunks in Qdrant collection: {project_group}"
+            f"[RAG] Successfully stored {chunk_count} chunks in Qdrant collection: "
+            f"{vector_store.collection_name_for(project_group)}"
         )
 
     def process_for_summary(self, file_path: str, project_group: str):
@@ -63,18 +130,17 @@ class DocumentProcessor:
         문서의 요약을 생성하고 데이터베이스에 저장합니다.
         """
         print(f"[Summary] Processing started for {file_path}")
-        loader = UnstructuredLoader(file_path, mode="elements")
-        documents = loader.load()
-        full_text = "\n\n".join([d.page_content for d in documents])
+        full_text = self.load_text(file_path, max_chars=SUMMARY_MAX_INPUT_CHARS)
 
-        summary = openai_client.invoke(
+        summary = clients.invoke_llm(
             [
                 {
                     "role": "system",
                     "content": "당신은 요약에 능숙한 AI입니다. 짧은 문서라면, 구체적인 요약을 생성하고, 긴 문서라면 대략적인 요약을 수행합니다.",
                 },
                 {"role": "user", "content": f"다음 문서를 요약해줘.\n\n{full_text}"},
-            ]
+            ],
+            clients.SUMMARY_MODEL,
         )
         summary_text = summary.content.strip()
         print(f"[Summary] Generated summary for {file_path}")
@@ -88,14 +154,12 @@ class DocumentProcessor:
             cur.execute(sql, (project_group,))
             group_id = cur.fetchone()
 
-            sql = "SELECT id FROM summaries WHERE group_id = %s AND file_name = %s"
-            cur.execute(sql, (group_id[0], file_name))
-            if cur.fetchone():
-                id = cur.fetchone()
-
+            # 재시도 시 같은 문서의 요약이 중복 저장되지 않도록 갱신합니다.
             sql = """
-                   INSERT INTO summaries (group_id, file_name, summary) 
+                   INSERT INTO summaries (group_id, file_name, summary)
                    VALUES (%s, %s, %s)
+                   ON CONFLICT (group_id, file_name)
+                   DO UPDATE SET summary = EXCLUDED.summary
                    """
             cur.execute(sql, (group_id[0], file_name, summary_text))
             self.conn.commit()
@@ -105,25 +169,22 @@ class DocumentProcessor:
         except Exception as e:
             print(f"❌ Error Summaring file: {e}")
             self.conn.rollback()
+            raise
         finally:
             cur.close()
 
-    def process_for_mindmap(self, project_group: str, new_document_text: str):
+    def process_for_mindmap(self, group_id: int, documents: list):
         """
-        프로젝트 그룹의 마인드맵을 생성하거나 업데이트합니다.
+        새 문서들을 한 번의 LLM 호출로 프로젝트 그룹의 마인드맵에 반영합니다.
+        documents 는 (파일 이름, 내용) 목록입니다.
+        커밋은 그룹 잠금을 잡고 있는 호출자(mindmap_updater)가 수행합니다.
         """
-        print(f"[Mindmap] Processing started for project group: {project_group}")
+        print(
+            f"[Mindmap] Processing {len(documents)} document(s) for group_id: {group_id}"
+        )
         cur = self.conn.cursor(cursor_factory=RealDictCursor)
 
         try:
-            sql = "SELECT id FROM project_groups WHERE group_name = %s"
-            cur.execute(sql, (project_group,))
-            group_id_result = cur.fetchone()
-            if not group_id_result:
-                print(f"❌ Group '{project_group}' not found in database.")
-                return
-            group_id = group_id_result["id"]
-
             sql = "SELECT mindmap_data FROM mindmaps WHERE group_id = %s"
             cur.execute(sql, (group_id,))
             existing_mindmap_result = cur.fetchone()
@@ -133,6 +194,10 @@ class DocumentProcessor:
                 else None
             )
 
+            new_document_text = "\n\n".join(
+                f"### {file_name}\n{text}" for file_name, text in documents
+            )
+
             if existing_mindmap_json:
                 prompt = f"""
                 기존 마인드맵:
@@ -152,7 +217,7 @@ class DocumentProcessor:
                 """
                 print("[Mindmap] Creating new mindmap.")
 
-            mindmap_response = openai_client.invoke(
+            mindmap_response = clients.invoke_llm(
                 [
                     {
                         "role": "system",
@@ -160,6 +225,7 @@ class DocumentProcessor:
                     },
                     {"role": "user", "content": prompt},
                 ],
+                clients.SUMMARY_MODEL,
                 tools=[
                     {
                         "type": "function",
@@ -192,10 +258,8 @@ class DocumentProcessor:
                     f"[Mindmap] Successfully created new mindmap for group_id: {group_id}"
                 )
 
-            self.conn.commit()
-
         except Exception as e:
-            print(f"❌ Error processing mindmap for group {project_group}: {e}")
-            self.conn.rollback()
+            print(f"❌ Error processing mindmap for group_id {group_id}: {e}")
+            raise
         finally:
             cur.close()
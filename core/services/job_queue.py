@@ -0,0 +1,191 @@
+"""
+문서 처리 작업용 RabbitMQ 큐(레인)를 관리합니다.
+
+업로드 시 파일 크기와 (PDF 라면) 페이지 수를 추정해 small / large 레인 중 하나로 보냅니다.
+작은 문서가 큰 문서 뒤에서 기다리지 않도록 워커는 small 레인을 먼저 확인합니다.
+"""
+import json
+import os
+import re
+
+import pika
+
+from core.settings import config
+
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
+QUEUE_CONFIG = config.get("queue", {})
+
+# 레인 도입 이전에 발행된 메시지가 남아 있을 수 있어 계속 소비합니다.
+LEGACY_QUEUE = "document_queue"
+SMALL_QUEUE = "document_queue.small"
+LARGE_QUEUE = "document_queue.large"
+LANE_QUEUES = {"small": SMALL_QUEUE, "large": LARGE_QUEUE}
+# 재시도 횟수를 모두 소진한 메시지가 모이는 큐
+DEAD_LETTER_QUEUE = "document_queue.dead"
+
+# 그룹별 마인드맵 갱신 작업 큐. 지연 큐에서 debounce 시간만큼 기다린 뒤 이 큐로 옮겨집니다.
+MINDMAP_QUEUE = "mindmap_queue"
+MINDMAP_DEBOUNCE_SECONDS = config.get("mindmap", {}).get("debounce_seconds", 30)
+# 재시도 횟수를 모두 소진한 마인드맵 작업(과 그 작업이 반영하지 못한 문서 목록)이 모이는 큐
+MINDMAP_DEAD_LETTER_QUEUE = "mindmap_queue.dead"
+
+# n 번째 재시도는 RETRY_DELAYS[n-1] 초 뒤에 원래 레인으로 돌아갑니다.
+RETRY_DELAYS = QUEUE_CONFIG.get("retry_delays", [10, 60, 300])
+
+SMALL_MAX_BYTES = QUEUE_CONFIG.get("small_max_bytes", 2 * 1024 * 1024)
+SMALL_MAX_PAGES = QUEUE_CONFIG.get("small_max_pages", 20)
+
+_PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![s\w])")
+
+
+def get_connection(**kwargs):
+    return pika.BlockingConnection(
+        pika.ConnectionParameters(host=RABBITMQ_HOST, **kwargs)
+    )
+
+
+def retry_queue_name(lane: str, delay: int) -> str:
+    # 큐의 TTL 인자는 선언 후 바꿀 수 없으므로 지연 시간을 이름에 포함합니다.
+    return f"{LANE_QUEUES[lane]}.retry.{delay}s"
+
+
+def mindmap_delay_queue_name() -> str:
+    return f"{MINDMAP_QUEUE}.delay.{MINDMAP_DEBOUNCE_SECONDS}s"
+
+
+def mindmap_retry_queue_name(delay: int) -> str:
+    return f"{MINDMAP_QUEUE}.retry.{delay}s"
+
+
+def declare_queues(channel):
+    for queue in (
+        LEGACY_QUEUE,
+        SMALL_QUEUE,
+        LARGE_QUEUE,
+        DEAD_LETTER_QUEUE,
+        MINDMAP_QUEUE,
+        MINDMAP_DEAD_LETTER_QUEUE,
+    ):
+        channel.queue_declare(queue=queue, durable=True)
+
+    channel.queue_declare(
+        queue=mindmap_delay_queue_name(),
+        durable=True,
+        arguments={
+            "x-message-ttl": int(MINDMAP_DEBOUNCE_SECONDS * 1000),
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": MINDMAP_QUEUE,
+        },
+    )
+
+    # 재시도 큐: 소비자 없이 TTL 동안 보관했다가 원래 레인 큐로 dead-letter 됩니다.
+    for lane, lane_queue in LANE_QUEUES.items():
+        for delay in RETRY_DELAYS:
+            channel.queue_declare(
+                queue=retry_queue_name(lane, delay),
+                durable=True,
+                arguments={
+                    "x-message-ttl": int(delay * 1000),
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": lane_queue,
+                },
+            )
+    for delay in RETRY_DELAYS:
+        channel.queue_declare(
+            queue=mindmap_retry_queue_name(delay),
+            durable=True,
+            arguments={
+                "x-message-ttl": int(delay * 1000),
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": MINDMAP_QUEUE,
+            },
+        )
+
+
+def estimate_page_count(file_path: str):
+    """
+    PDF 의 페이지 객체 수를 세어 페이지 수를 추정합니다.
+    PDF 가 아니거나 (압축된 객체 스트림 등으로) 셀 수 없으면 None 을 반환합니다.
+    """
+    if not file_path.lower().endswith(".pdf"):
+        return None
+    count = 0
+    tail = b""
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            data = tail + chunk
+            count += len(_PDF_PAGE_PATTERN.findall(data))
+            # 청크 경계에 걸친 패턴을 놓치지 않도록 끝부분을 다음 청크와 이어 붙입니다.
+            tail = data[-32:]
+            count -= len(_PDF_PAGE_PATTERN.findall(tail))
+    count += len(_PDF_PAGE_PATTERN.findall(tail))
+    return count or None
+
+
+def choose_lane(file_size: int, page_count=None) -> str:
+    """파일 크기와 페이지 수로 작업 레인을 결정합니다."""
+    if page_count is not None and page_count > SMALL_MAX_PAGES:
+        return "large"
+    if file_size > SMALL_MAX_BYTES:
+        return "large"
+    return "small"
+
+
+def _publish(channel, queue: str, message: dict):
+    channel.basic_publish(
+        exchange="",
+        routing_key=queue,
+        body=json.dumps(message),
+        properties=pika.BasicProperties(
+            delivery_mode=2,
+        ),
+    )
+
+
+def publish_retry(channel, message: dict) -> bool:
+    """
+    실패한 메시지를 백오프 후 다시 처리되도록 재시도 큐에 발행합니다.
+    message["attempt"] 가 재시도 횟수를 넘으면 dead-letter 큐로 보내고 False 를 반환합니다.
+    """
+    attempt = message.get("attempt", 0)
+    if attempt > len(RETRY_DELAYS):
+        _publish(channel, DEAD_LETTER_QUEUE, message)
+        return False
+    lane = message.get("lane", "large")
+    _publish(channel, retry_queue_name(lane, RETRY_DELAYS[attempt - 1]), message)
+    return True
+
+
+def publish_mindmap_retry(channel, message: dict) -> bool:
+    """
+    실패한 마인드맵 작업을 백오프 후 다시 실행되도록 재시도 큐에 발행합니다.
+    message["attempt"] 가 재시도 횟수를 넘으면 dead-letter 큐로 보내고 False 를 반환합니다.
+    """
+    attempt = message.get("attempt", 0)
+    if attempt > len(RETRY_DELAYS):
+        _publish(channel, MINDMAP_DEAD_LETTER_QUEUE, message)
+        return False
+    _publish(channel, mindmap_retry_queue_name(RETRY_DELAYS[attempt - 1]), message)
+    return True
+
+
+def publish_document_job(message: dict, lane: str):
+    """문서 처리 메시지를 해당 레인 큐에 발행합니다."""
+    connection = get_connection()
+    try:
+        channel = connection.channel()
+        declare_queues(channel)
+        _publish(channel, LANE_QUEUES[lane], message)
+    finally:
+        connection.close()
+
+
+def publish_mindmap_job(group_id: int):
+    """debounce 시간 뒤에 실행될 그룹 마인드맵 갱신 작업을 발행합니다."""
+    connection = get_connection()
+    try:
+        channel = connection.channel()
+        declare_queues(channel)
+        _publish(channel, mindmap_delay_queue_name(), {"group_id": group_id})
+    finally:
+        connection.close()
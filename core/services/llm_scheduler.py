@@ -0,0 +1,297 @@
+"""
+OpenAI 호출(채팅, 요약, 마인드맵, 임베딩)을 조율하는 rate-limit 인지 스케줄러.
+
+- 모델별 요청(RPM) / 토큰(TPM) 버킷으로 호출 속도를 제한합니다.
+- 동시 실행 수는 AIMD 방식으로 조절합니다. (429 발생 시 절반, 연속 성공 시 1씩 증가)
+- 재시도는 지수 백오프 + full jitter 를 사용하고, 서버가 보낸 Retry-After 를 우선합니다.
+- 대기열은 우선순위 순으로 처리되어 대화형 채팅(INTERACTIVE)이 문서 처리(BACKGROUND)보다 먼저 실행됩니다.
+
+버킷은 프로세스마다 따로 존재하므로, 설정의 rpm/tpm(API 키 전체 한도)을 프로세스 역할
+(LLM_SCHEDULER_ROLE 환경 변수: api | worker)에 따라 나눠 씁니다.
+worker 프로세스들은 worker_share 를 worker_processes 개로, API 서버는 나머지를 api_processes 개로 나눕니다.
+워커 수를 늘리면 worker_processes 도 함께 맞춰야 전체 호출량이 한도를 넘지 않습니다.
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+
+from core.settings import config
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+SCHEDULER_CONFIG = config.get("llm_scheduler", {})
+
+# 재시도할 HTTP 상태 코드 (rate limit, 서버 과부하/오류)
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def estimate_tokens(payload) -> int:
+    """문자열 또는 메시지 리스트의 토큰 수를 대략 추정합니다. (약 4자당 1토큰)"""
+    if isinstance(payload, str):
+        return len(payload) // 4 + 1
+    if isinstance(payload, dict):
+        return estimate_tokens(str(payload.get("content", "")))
+    if isinstance(payload, (list, tuple)):
+        return sum(estimate_tokens(item) for item in payload)
+    return estimate_tokens(str(payload))
+
+
+class TokenBucket:
+    """분당 rate 만큼 채워지는 토큰 버킷. (thread-safe 하지 않으므로 ModelLimiter 의 락 안에서 사용)"""
+
+    def __init__(self, rate_per_minute: float, clock=time.monotonic):
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.updated_at = clock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount 만큼 소비하려면 몇 초 기다려야 하는지 반환합니다."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        # 실제 사용량 보정으로 음수가 될 수 있으며, 그만큼 다음 호출이 늦춰집니다.
+        self.tokens -= amount
+
+
+class ModelLimiter:
+    """한 모델에 대한 버킷, 동시 실행 수, 우선순위 대기열을 관리합니다."""
+
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        background_share: float = 1.0,
+        clock=time.monotonic,
+    ):
+        # background_share: 이 프로세스 안에서 BACKGROUND 호출이 쓸 수 있는 한도 비율
+        self._clock = clock
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        share = max(0.01, min(1.0, background_share))
+        self.background_requests = TokenBucket(rpm * share, clock)
+        self.background_tokens = TokenBucket(tpm * share, clock)
+
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.paused_until = 0.0
+
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def _buckets(self, priority: int):
+        if priority == BACKGROUND:
+            return (
+                (self.requests, self.background_requests),
+                (self.tokens, self.background_tokens),
+            )
+        return (self.requests,), (self.tokens,)
+
+    def acquire(self, priority: int, requests: int, tokens: int):
+        """차례가 오고, 동시 실행 슬롯과 버킷에 여유가 생길 때까지 기다립니다."""
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] == ticket and self.in_flight < self.concurrency:
+                        now = self._clock()
+                        request_buckets, token_buckets = self._buckets(priority)
+                        wait = max(
+                            [self.paused_until - now]
+                            + [b.wait_time(requests, now) for b in request_buckets]
+                            + [b.wait_time(tokens, now) for b in token_buckets]
+                        )
+                        if wait <= 0:
+                            for bucket in request_buckets:
+                                bucket.consume(requests)
+                            for bucket in token_buckets:
+                                bucket.consume(tokens)
+                            heapq.heappop(self._waiting)
+                            self.in_flight += 1
+                            self._cond.notify_all()
+                            return
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait(1.0)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def release(self, rate_limited: bool = False, retry_after: float = None):
+        """호출이 끝나면 슬롯을 반납하고 결과에 따라 동시 실행 수를 조절합니다."""
+        with self._cond:
+            self.in_flight -= 1
+            if rate_limited:
+                self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                self.successes = 0
+                if retry_after:
+                    self.paused_until = max(
+                        self.paused_until, self._clock() + retry_after
+                    )
+            else:
+                self.successes += 1
+                if (
+                    self.successes >= self.concurrency
+                    and self.concurrency < self.max_concurrency
+                ):
+                    self.concurrency += 1
+                    self.successes = 0
+            self._cond.notify_all()
+
+    def settle_tokens(self, priority: int, delta: int):
+        """추정치와 실제 사용 토큰의 차이를 버킷에 반영합니다."""
+        with self._cond:
+            for bucket in self._buckets(priority)[1]:
+                bucket.consume(delta)
+
+
+def _status_code(error):
+    return getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+
+
+def _retry_after(error):
+    """에러 응답의 Retry-After(-ms) 헤더를 초 단위로 반환합니다."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def _is_retryable(error) -> bool:
+    try:
+        import openai
+
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return True
+    except ImportError:
+        pass
+    return _status_code(error) in RETRYABLE_STATUS_CODES
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        scheduler_config: dict,
+        role: str = None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.config = scheduler_config
+        self.role = role or os.getenv("LLM_SCHEDULER_ROLE", "api")
+        self.max_retries = scheduler_config.get("max_retries", 6)
+        self.base_delay = scheduler_config.get("base_delay", 1.0)
+        self.max_delay = scheduler_config.get("max_delay", 60.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def process_share(self) -> float:
+        """API 키 전체 한도 중 이 프로세스가 사용할 비율을 반환합니다."""
+        worker_share = max(0.0, min(1.0, self.config.get("worker_share", 0.8)))
+        if self.role == "worker":
+            return worker_share / max(1, self.config.get("worker_processes", 1))
+        return (1.0 - worker_share) / max(1, self.config.get("api_processes", 1))
+
+    def limiter(self, model: str) -> ModelLimiter:
+        with self._lock:
+            if model not in self._limiters:
+                limits = self.config.get("models", {}).get(model) or self.config.get(
+                    "default", {}
+                )
+                share = self.process_share()
+                self._limiters[model] = ModelLimiter(
+                    rpm=limits.get("rpm", 500) * share,
+                    tpm=limits.get("tpm", 30000) * share,
+                    max_concurrency=limits.get("max_concurrency", 4),
+                    min_concurrency=limits.get("min_concurrency", 1),
+                    # 워커는 모든 호출이 BACKGROUND 이고, API 서버에서는 채팅 기록 압축 등이 해당합니다.
+                    background_share=(
+                        1.0
+                        if self.role == "worker"
+                        else self.config.get("api_background_share", 0.5)
+                    ),
+                    clock=self._clock,
+                )
+            return self._limiters[model]
+
+    def run(
+        self,
+        model: str,
+        fn,
+        priority: int = BACKGROUND,
+        tokens: int = 1,
+        requests: int = 1,
+    ):
+        """
+        fn 을 모델의 rate limit 안에서 실행하고, 재시도 가능한 오류는 백오프 후 다시 시도합니다.
+        """
+        limiter = self.limiter(model)
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire(priority, requests, tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                rate_limited = _status_code(e) == 429
+                retry_after = _retry_after(e)
+                limiter.release(rate_limited=rate_limited, retry_after=retry_after)
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = (
+                    retry_after
+                    if retry_after is not None
+                    else random.uniform(
+                        0, min(self.max_delay, self.base_delay * 2**attempt)
+                    )
+                )
+                print(
+                    f"[Scheduler] {model} call failed ({e.__class__.__name__}), "
+                    f"retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})"
+                )
+                self._sleep(delay)
+                continue
+
+            limiter.release()
+            usage = getattr(result, "usage_metadata", None)
+            if usage and usage.get("total_tokens"):
+                limiter.settle_tokens(priority, usage["total_tokens"] - tokens)
+            return result
+
+
+@lru_cache(maxsize=None)
+def get_scheduler() -> LLMScheduler:
+    """프로세스 전체에서 공유하는 스케줄러를 반환합니다."""
+    return LLMScheduler(SCHEDULER_CONFIG)
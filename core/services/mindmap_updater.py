@@ -0,0 +1,192 @@
+"""
+그룹 마인드맵 갱신을 모아서(coalesce) 처리합니다.
+
+문서 처리 워커는 마인드맵을 직접 갱신하지 않고 mindmap_pending 에 문서를 등록합니다.
+그룹당 예약된 작업(mindmap_jobs)이 없을 때만 debounce 지연 큐에 작업을 발행하므로,
+같은 시간 창에 올라온 문서들은 하나의 작업에서 한 번의 LLM 호출로 반영됩니다.
+작업은 그룹별 advisory lock 안에서 실행되어 동시에 실행된 워커가 서로의 결과를 덮어쓰지 않습니다.
+
+실패한 작업은 시도 횟수(attempt)와 반영할 문서 수(batch_size)를 메시지에 담아 백오프 후 재시도되며,
+재시도마다 batch_size 를 절반으로 줄입니다. 재시도를 모두 소진하면 그 배치의 문서들을 대기 목록에서
+빼서 dead-letter 큐로 보내, 반영할 수 없는 문서 때문에 그룹의 이후 문서들이 막히지 않게 합니다.
+"""
+from core.services import job_queue
+from core.services.document_processor import DocumentProcessor
+from core.settings import config
+
+MINDMAP_CONFIG = config.get("mindmap", {})
+MAX_DOCUMENTS_PER_MERGE = MINDMAP_CONFIG.get("max_documents_per_merge", 50)
+# 예약 후 이 시간이 지나도 실행되지 않은 작업은 발행이 유실된 것으로 보고 다시 발행합니다.
+# (재시도 중인 작업의 예약도 유지되도록 가장 긴 재시도 지연보다 길게 잡습니다.)
+STALE_JOB_SECONDS = (
+    job_queue.MINDMAP_DEBOUNCE_SECONDS * 10 + max(job_queue.RETRY_DELAYS, default=0) + 60
+)
+
+# pg_advisory_xact_lock(namespace, group_id) 의 namespace
+MINDMAP_LOCK_NAMESPACE = 1
+
+
+def schedule_mindmap_job(conn, group_id: int):
+    """그룹에 예약된 작업이 없으면 예약하고 지연 큐에 발행합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            INSERT INTO mindmap_jobs (group_id) VALUES (%s)
+            ON CONFLICT (group_id) DO UPDATE SET scheduled_at = CURRENT_TIMESTAMP
+            WHERE mindmap_jobs.scheduled_at
+                  < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            RETURNING group_id
+            """
+        cur.execute(sql, (group_id, STALE_JOB_SECONDS))
+        scheduled = cur.fetchone() is not None
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+    if scheduled:
+        job_queue.publish_mindmap_job(group_id)
+        print(f"[Mindmap] Scheduled mindmap update for group_id: {group_id}")
+
+
+def reserve_mindmap_job(conn, group_id: int):
+    """
+    재시도 큐에 발행하기 전에 그룹의 예약을 다시 잡아, 재시도를 기다리는 동안 등록된 문서가
+    별도의 작업을 예약하지 않고 재시도 작업에 합쳐지게 합니다.
+    """
+    cur = conn.cursor()
+    try:
+        sql = """
+            INSERT INTO mindmap_jobs (group_id) VALUES (%s)
+            ON CONFLICT (group_id) DO UPDATE SET scheduled_at = CURRENT_TIMESTAMP
+            """
+        cur.execute(sql, (group_id,))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+
+def get_pending_batch(conn, group_id: int, batch_size: int):
+    """다음 작업이 반영할 (가장 오래된) 대기 문서들을 (파일 이름, 등록 시각) 목록으로 반환합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            SELECT file_name, created_at FROM mindmap_pending
+            WHERE group_id = %s
+            ORDER BY created_at
+            LIMIT %s
+            """
+        cur.execute(sql, (group_id, batch_size))
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def remove_pending(conn, group_id: int, pending: list):
+    """
+    대기 목록에서 문서들을 제거합니다.
+    조회 이후 같은 파일이 다시 등록되었다면(created_at 갱신) 대기 목록에 남겨 둡니다.
+    """
+    cur = conn.cursor()
+    try:
+        for file_name, created_at in pending:
+            cur.execute(
+                """
+                DELETE FROM mindmap_pending
+                WHERE group_id = %s AND file_name = %s AND created_at = %s
+                """,
+                (group_id, file_name, created_at),
+            )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+
+def enqueue_mindmap_update(conn, group_id: int, file_name: str):
+    """문서를 그룹의 마인드맵 반영 대기 목록에 추가하고 갱신 작업을 예약합니다."""
+    cur = conn.cursor()
+    try:
+        sql = """
+            INSERT INTO mindmap_pending (group_id, file_name) VALUES (%s, %s)
+            ON CONFLICT (group_id, file_name)
+            DO UPDATE SET created_at = CURRENT_TIMESTAMP
+            """
+        cur.execute(sql, (group_id, file_name))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+    schedule_mindmap_job(conn, group_id)
+
+
+def run_mindmap_job(conn, group_id: int, batch_size: int = MAX_DOCUMENTS_PER_MERGE):
+    """
+    대기 중인 문서 중 가장 오래된 batch_size 개를 한 번의 LLM 호출로 마인드맵에 반영합니다.
+    문서 내용으로는 summary 단계에서 저장된 요약을 사용합니다.
+    """
+    cur = conn.cursor()
+    try:
+        # 예약을 먼저 해제해, 처리 중에 새로 올라온 문서는 다음 작업으로 예약되게 합니다.
+        cur.execute("DELETE FROM mindmap_jobs WHERE group_id = %s", (group_id,))
+        conn.commit()
+
+        cur.execute(
+            "SELECT pg_advisory_xact_lock(%s, %s)", (MINDMAP_LOCK_NAMESPACE, group_id)
+        )
+        sql = """
+            SELECT p.file_name, p.created_at, s.summary
+            FROM mindmap_pending p
+            LEFT JOIN summaries s
+              ON s.group_id = p.group_id AND s.file_name = p.file_name
+            WHERE p.group_id = %s
+            ORDER BY p.created_at
+            LIMIT %s
+            """
+        cur.execute(sql, (group_id, batch_size))
+        pending = cur.fetchall()
+        if not pending:
+            conn.commit()
+            return
+
+        documents = [
+            (file_name, summary or file_name) for file_name, _, summary in pending
+        ]
+        DocumentProcessor(conn).process_for_mindmap(group_id, documents)
+
+        # 처리 중 같은 파일이 다시 등록되었다면(created_at 갱신) 대기 목록에 남겨 둡니다.
+        for file_name, created_at, _ in pending:
+            cur.execute(
+                """
+                DELETE FROM mindmap_pending
+                WHERE group_id = %s AND file_name = %s AND created_at = %s
+                """,
+                (group_id, file_name, created_at),
+            )
+        cur.execute(
+            "SELECT EXISTS (SELECT 1 FROM mindmap_pending WHERE group_id = %s)",
+            (group_id,),
+        )
+        has_more = cur.fetchone()[0]
+        conn.commit()
+        print(
+            f"[Mindmap] Merged {len(pending)} document(s) into mindmap for group_id: {group_id}"
+        )
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cur.close()
+
+    if has_more:
+        schedule_mindmap_job(conn, group_id)
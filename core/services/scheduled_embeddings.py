@@ -0,0 +1,36 @@
+import math
+
+from langchain_core.embeddings import Embeddings
+
+from core.services.llm_scheduler import estimate_tokens, get_scheduler
+
+
+class ScheduledEmbeddings(Embeddings):
+    """
+    임베딩 요청을 LLMScheduler 를 통해 실행하는 래퍼입니다.
+    LangChain 벡터스토어에 그대로 전달할 수 있습니다.
+    """
+
+    def __init__(self, embeddings, model: str, priority: int):
+        self.embeddings = embeddings
+        self.model = model
+        self.priority = priority
+
+    def embed_documents(self, texts):
+        # OpenAIEmbeddings 는 chunk_size 개씩 나누어 요청합니다.
+        batch_size = getattr(self.embeddings, "chunk_size", 1000) or 1000
+        return get_scheduler().run(
+            self.model,
+            lambda: self.embeddings.embed_documents(texts),
+            priority=self.priority,
+            tokens=estimate_tokens(list(texts)),
+            requests=max(1, math.ceil(len(texts) / batch_size)),
+        )
+
+    def embed_query(self, text):
+        return get_scheduler().run(
+            self.model,
+            lambda: self.embeddings.embed_query(text),
+            priority=self.priority,
+            tokens=estimate_tokens(text),
+        )
@@ -0,0 +1,239 @@
+"""
+Qdrant 컬렉션 레이아웃을 관리합니다.
+
+- per_group: 프로젝트 그룹마다 그룹 이름으로 된 컬렉션을 사용합니다. (기존 방식)
+- shared: 모든 그룹의 청크를 하나의 컬렉션에 저장하고, 각 포인트의
+  `metadata.group_id` 페이로드 인덱스로 필터링하여 검색합니다.
+"""
+from core.services import clients
+from core.services.llm_scheduler import BACKGROUND, INTERACTIVE
+
+QDRANT_CONFIG = clients.QDRANT_CONFIG
+
+LAYOUT = QDRANT_CONFIG.get("layout", "per_group")
+SHARED_COLLECTION = QDRANT_CONFIG.get("shared_collection", "autobrief_chunks")
+VECTOR_SIZE = QDRANT_CONFIG.get("vector_size", 1536)
+COLLECTION_SETTINGS = QDRANT_CONFIG.get("collection", {})
+SEARCH_SETTINGS = QDRANT_CONFIG.get("search", {})
+
+# LangChain Qdrant 는 청크 메타데이터를 `metadata` 페이로드 아래에 저장합니다.
+GROUP_ID_KEY = "metadata.group_id"
+DOCUMENT_ID_KEY = "metadata.document_id"
+SOURCE_KEY = "metadata.source"
+
+# 이 프로세스에서 존재를 확인한 컬렉션. 다른 프로세스에서 삭제될 수 있으므로
+# add_chunks 는 컬렉션이 없다는 오류를 받으면 이 기록을 지우고 다시 생성합니다.
+_ensured_collections = set()
+
+
+def is_shared_layout() -> bool:
+    return LAYOUT == "shared"
+
+
+def collection_name_for(group_name: str) -> str:
+    """그룹의 청크가 저장되는 컬렉션 이름을 반환합니다."""
+    return SHARED_COLLECTION if is_shared_layout() else group_name
+
+
+def group_filter(group_id: int):
+    """shared 레이아웃에서 한 그룹의 포인트만 선택하는 필터를 반환합니다."""
+    from qdrant_client import models
+
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key=GROUP_ID_KEY, match=models.MatchValue(value=group_id)
+            )
+        ]
+    )
+
+
+def build_quantization_config(settings: dict):
+    """설정의 quantization 항목을 Qdrant 양자화 설정으로 변환합니다. (none 이면 None)"""
+    from qdrant_client import models
+
+    quantization = settings.get("quantization") or {}
+    quantization_type = quantization.get("type", "none")
+    always_ram = quantization.get("always_ram", True)
+
+    if quantization_type == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=quantization.get("quantile"),
+                always_ram=always_ram,
+            )
+        )
+    if quantization_type == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    if quantization_type == "none":
+        return None
+    raise ValueError(f"Unknown quantization type: {quantization_type}")
+
+
+def build_hnsw_config(settings: dict):
+    """설정의 hnsw 항목을 Qdrant HNSW 설정으로 변환합니다. (비어 있으면 None)"""
+    from qdrant_client import models
+
+    hnsw = settings.get("hnsw") or {}
+    if not hnsw:
+        return None
+    return models.HnswConfigDiff(
+        m=hnsw.get("m"),
+        ef_construct=hnsw.get("ef_construct"),
+        on_disk=hnsw.get("on_disk"),
+    )
+
+
+def build_search_params(settings: dict = None):
+    """검색 시 사용할 HNSW ef 와 양자화 rescoring 옵션을 반환합니다. (비어 있으면 None)"""
+    from qdrant_client import models
+
+    settings = SEARCH_SETTINGS if settings is None else settings
+    if not settings:
+        return None
+
+    quantization = None
+    if "rescore" in settings or "oversampling" in settings:
+        quantization = models.QuantizationSearchParams(
+            rescore=settings.get("rescore", True),
+            oversampling=settings.get("oversampling"),
+        )
+    return models.SearchParams(hnsw_ef=settings.get("hnsw_ef"), quantization=quantization)
+
+
+def create_collection(collection_name: str, settings: dict = None):
+    """
+    config.yaml 의 qdrant.collection 설정(양자화, 원본 벡터 on-disk 저장, HNSW)으로 컬렉션을 생성합니다.
+    """
+    from qdrant_client import models
+
+    settings = COLLECTION_SETTINGS if settings is None else settings
+    clients.get_qdrant_client().create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(
+            size=VECTOR_SIZE,
+            distance=models.Distance.COSINE,
+            on_disk=settings.get("on_disk", False),
+        ),
+        hnsw_config=build_hnsw_config(settings),
+        quantization_config=build_quantization_config(settings),
+    )
+
+
+def ensure_collection(collection_name: str, shared: bool = False):
+    """
+    컬렉션이 없으면 생성합니다. shared 컬렉션에는 그룹/문서 필터용 페이로드 인덱스를 함께 만듭니다.
+    """
+    if collection_name in _ensured_collections:
+        return
+
+    from qdrant_client import models
+
+    client = clients.get_qdrant_client()
+    if not client.collection_exists(collection_name):
+        try:
+            create_collection(collection_name)
+            print(f"[Qdrant] Created collection: {collection_name}")
+        except Exception:
+            # 다른 워커가 동시에 생성한 경우
+            if not client.collection_exists(collection_name):
+                raise
+
+    if shared:
+        for field_name, field_schema in (
+            (GROUP_ID_KEY, models.PayloadSchemaType.INTEGER),
+            (DOCUMENT_ID_KEY, models.PayloadSchemaType.INTEGER),
+            (SOURCE_KEY, models.PayloadSchemaType.KEYWORD),
+        ):
+            # 이미 존재하는 인덱스에 대한 생성 요청은 무시됩니다.
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
+
+    _ensured_collections.add(collection_name)
+
+
+def get_vector_store(group_name: str, priority: int = BACKGROUND):
+    """
+    그룹이 사용하는 컬렉션에 대한 LangChain Qdrant 벡터스토어를 반환합니다.
+    임베딩 호출은 priority 우선순위로 스케줄링됩니다.
+    """
+    from langchain_community.vectorstores import Qdrant
+
+    return Qdrant(
+        client=clients.get_qdrant_client(),
+        collection_name=collection_name_for(group_name),
+        embeddings=clients.get_embeddings(priority),
+    )
+
+
+def _check_group_exists(group_name: str, group_exists):
+    if group_exists is not None and not group_exists():
+        raise ValueError(
+            f"Group '{group_name}' was deleted; not recreating its collection."
+        )
+
+
+def add_chunks(
+    group_name: str, texts: list, metadatas: list, ids: list = None, group_exists=None
+) -> list:
+    """
+    청크와 메타데이터를 그룹의 컬렉션에 저장하고 포인트 ID 목록을 반환합니다.
+    ids 를 지정하면 같은 ID 의 포인트를 덮어씁니다.
+    group_exists 를 지정하면 컬렉션을 (다시) 만들기 전에 호출해, 처리 중에 그룹이 삭제되었다면
+    컬렉션을 되살리지 않고 ValueError 를 발생시킵니다. (per_group 레이아웃에서는 같은 이름으로
+    새로 만든 그룹이 삭제된 그룹의 청크를 검색하게 됩니다.)
+    """
+    collection_name = collection_name_for(group_name)
+    if collection_name not in _ensured_collections:
+        _check_group_exists(group_name, group_exists)
+    ensure_collection(collection_name, shared=is_shared_layout())
+    try:
+        return get_vector_store(group_name).add_texts(
+            texts, metadatas=metadatas, ids=ids
+        )
+    except Exception as e:
+        if getattr(e, "status_code", None) != 404:
+            raise
+        # 다른 프로세스(API 서버)에서 그룹 삭제로 컬렉션이 지워진 경우
+        # 그룹이 아직 있을 때만 생성 기록을 지우고 컬렉션을 다시 만든 뒤 한 번 더 시도합니다.
+        _ensured_collections.discard(collection_name)
+        _check_group_exists(group_name, group_exists)
+        ensure_collection(collection_name, shared=is_shared_layout())
+        return get_vector_store(group_name).add_texts(
+            texts, metadatas=metadatas, ids=ids
+        )
+
+
+def get_retriever(group_id: int, group_name: str):
+    """그룹의 청크만 검색하는 retriever 를 반환합니다."""
+    search_kwargs = {}
+    search_params = build_search_params()
+    if search_params is not None:
+        search_kwargs["search_params"] = search_params
+    if is_shared_layout():
+        search_kwargs["filter"] = group_filter(group_id)
+    return get_vector_store(group_name, INTERACTIVE).as_retriever(
+        search_kwargs=search_kwargs
+    )
+
+
+def delete_group(group_id: int, group_name: str):
+    """그룹에 속한 모든 벡터를 삭제합니다."""
+    from qdrant_client import models
+
+    client = clients.get_qdrant_client()
+    if is_shared_layout():
+        if client.collection_exists(SHARED_COLLECTION):
+            client.delete(
+                collection_name=SHARED_COLLECTION,
+                points_selector=models.FilterSelector(filter=group_filter(group_id)),
+            )
+    elif client.collection_exists(group_name):
+        client.delete_collection(group_name)
+        _ensured_collections.discard(group_name)
@@ -0,0 +1,149 @@
+"""
+Qdrant 저장/검색 설정별 recall 과 검색 지연 시간을 비교합니다.
+
+원본 컬렉션을 프리셋별 임시 컬렉션으로 복사한 뒤, 원본에서 뽑은 벡터를 질의로 사용해
+정확 검색(exact) 결과 대비 recall@k 와 지연 시간(p50/p95)을 측정합니다.
+
+사용 예:
+    python -m core.tools.benchmark_vector_settings my_group --queries 200 --limit 10
+"""
+import argparse
+import statistics
+import time
+
+from core.services import clients, vector_store
+from core.tools.rebuild_collections import wait_until_green
+
+# 각 프리셋은 (컬렉션 설정, 검색 설정) 입니다. "config" 는 config.yaml 의 현재 설정을 사용합니다.
+PRESETS = {
+    "float32": ({"on_disk": False, "quantization": {"type": "none"}}, {}),
+    "scalar": (
+        {"on_disk": True, "quantization": {"type": "scalar", "quantile": 0.99}},
+        {"rescore": False},
+    ),
+    "scalar_rescore": (
+        {"on_disk": True, "quantization": {"type": "scalar", "quantile": 0.99}},
+        {"rescore": True, "oversampling": 2.0},
+    ),
+    "binary": (
+        {"on_disk": True, "quantization": {"type": "binary"}},
+        {"rescore": False},
+    ),
+    "binary_rescore": (
+        {"on_disk": True, "quantization": {"type": "binary"}},
+        {"rescore": True, "oversampling": 3.0},
+    ),
+    "config": (vector_store.COLLECTION_SETTINGS, vector_store.SEARCH_SETTINGS),
+}
+
+
+def copy_collection(source: str, target: str, settings: dict, batch_size: int = 256):
+    from qdrant_client import models
+
+    client = clients.get_qdrant_client()
+    if client.collection_exists(target):
+        client.delete_collection(target)
+    vector_store.create_collection(target, settings)
+
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        if points:
+            client.upsert(
+                collection_name=target,
+                points=[models.PointStruct(id=p.id, vector=p.vector) for p in points],
+            )
+        if offset is None:
+            break
+
+
+def sample_queries(collection_name: str, count: int) -> list:
+    points, _ = clients.get_qdrant_client().scroll(
+        collection_name=collection_name, limit=count, with_vectors=True
+    )
+    return [(p.id, p.vector) for p in points]
+
+
+def search_ids(collection_name, query_id, vector, limit, search_params):
+    """질의 벡터 자신을 제외한 상위 limit 개의 포인트 ID 를 반환합니다."""
+    response = clients.get_qdrant_client().query_points(
+        collection_name=collection_name,
+        query=vector,
+        limit=limit + 1,
+        search_params=search_params,
+    )
+    return [p.id for p in response.points if p.id != query_id][:limit]
+
+
+def run_preset(name, source, queries, ground_truth, limit, keep):
+    collection_settings, search_settings = PRESETS[name]
+    target = f"{source}__bench_{name}"
+    copy_collection(source, target, collection_settings)
+    wait_until_green(target, timeout=600.0)
+
+    search_params = vector_store.build_search_params(search_settings)
+    recalls, latencies = [], []
+    for query_id, vector in queries:
+        started = time.perf_counter()
+        found = search_ids(target, query_id, vector, limit, search_params)
+        latencies.append((time.perf_counter() - started) * 1000)
+        expected = ground_truth[query_id]
+        if expected:
+            recalls.append(len(set(found) & set(expected)) / len(expected))
+
+    if not keep:
+        clients.get_qdrant_client().delete_collection(target)
+
+    latencies.sort()
+    return {
+        "recall": statistics.mean(recalls) if recalls else 0.0,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main():
+    from qdrant_client import models
+
+    parser = argparse.ArgumentParser(
+        description="Compare recall and latency across Qdrant vector settings."
+    )
+    parser.add_argument("collection", help="벤치마크에 사용할 원본 컬렉션")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument(
+        "--presets",
+        default=",".join(PRESETS),
+        help=f"쉼표로 구분한 프리셋 목록 ({', '.join(PRESETS)})",
+    )
+    parser.add_argument("--keep", action="store_true", help="임시 컬렉션을 삭제하지 않습니다.")
+    args = parser.parse_args()
+
+    queries = sample_queries(args.collection, args.queries)
+    # 원본 컬렉션이 양자화되어 있어도 원본(float32) 벡터로 정확 검색한 결과를 기준으로 삼습니다.
+    exact = models.SearchParams(
+        exact=True, quantization=models.QuantizationSearchParams(ignore=True)
+    )
+    ground_truth = {
+        query_id: search_ids(args.collection, query_id, vector, args.limit, exact)
+        for query_id, vector in queries
+    }
+
+    print(f"{'preset':<16}{'recall@' + str(args.limit):>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for name in args.presets.split(","):
+        result = run_preset(
+            name.strip(), args.collection, queries, ground_truth, args.limit, args.keep
+        )
+        print(
+            f"{name:<16}{result['recall']:>12.3f}{result['p50']:>10.2f}{result['p95']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+모듈 임포트 시간을 측정합니다.
+
+`python -X importtime` 으로 새 인터프리터에서 모듈을 임포트하고, 누적 시간이 큰
+최상위 패키지 순으로 정리해 출력합니다.
+
+사용 예:
+    python -m core.tools.import_time core.app.main
+    python -m core.tools.import_time core.app.main core.app.worker --top 15
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def measure(module: str) -> list:
+    """모듈을 새 프로세스에서 임포트하고 (모듈명, self_us, cumulative_us) 목록을 반환합니다."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        tail = result.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"Failed to import {module}: {tail[0]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(module: str, top: int):
+    rows = measure(module)
+    total_us = sum(self_us for _, self_us, _ in rows)
+
+    # 최상위 패키지(첫 번째 점 앞) 단위로 self 시간을 합산합니다.
+    per_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        per_package[name.strip().split(".")[0]] += self_us
+
+    print(f"\n=== {module}: {total_us / 1000:.1f} ms, {len(rows)} modules ===")
+    for package, self_us in sorted(
+        per_package.items(), key=lambda item: item[1], reverse=True
+    )[:top]:
+        print(f"{self_us / 1000:10.1f} ms  {package}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure module import time.")
+    parser.add_argument("modules", nargs="+", help="임포트할 모듈 경로")
+    parser.add_argument("--top", type=int, default=10, help="출력할 패키지 수")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        report(module, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+그룹별 Qdrant 컬렉션(per_group 레이아웃)을 공유 컬렉션(shared 레이아웃)으로 옮깁니다.
+
+각 포인트의 벡터와 페이로드를 그대로 복사하고 `metadata.group_id` 를 채워 넣습니다.
+포인트 ID를 유지하므로 중간에 실패해도 다시 실행하면 이어서 덮어씁니다.
+
+사용 예:
+    python -m core.tools.migrate_to_shared_collection --dry-run
+    python -m core.tools.migrate_to_shared_collection --delete-source
+이관이 끝나면 config.yaml 의 qdrant.layout 을 "shared" 로 변경하세요.
+"""
+import argparse
+
+from core.db import get_db
+from core.services import clients, vector_store
+
+
+def list_groups():
+    db_gen = get_db()
+    conn = next(db_gen)
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id, group_name FROM project_groups ORDER BY id")
+        return cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def migrate_group(group_id: int, group_name: str, batch_size: int, dry_run: bool):
+    """한 그룹의 컬렉션을 공유 컬렉션으로 복사하고 복사한 포인트 수를 반환합니다."""
+    from qdrant_client import models
+
+    client = clients.get_qdrant_client()
+    copied = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=group_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points and not dry_run:
+            batch = []
+            for point in points:
+                payload = dict(point.payload or {})
+                metadata = dict(payload.get("metadata") or {})
+                metadata["group_id"] = group_id
+                metadata.setdefault("source", "Unknown")
+                metadata.setdefault("document_id", None)
+                payload["metadata"] = metadata
+                batch.append(
+                    models.PointStruct(id=point.id, vector=point.vector, payload=payload)
+                )
+            client.upsert(
+                collection_name=vector_store.SHARED_COLLECTION, points=batch, wait=True
+            )
+        copied += len(points)
+        if offset is None:
+            return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move per-group Qdrant collections into the shared collection."
+    )
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument(
+        "--delete-source",
+        action="store_true",
+        help="복사가 끝난 그룹 컬렉션을 삭제합니다.",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="복사하지 않고 대상 포인트 수만 출력합니다."
+    )
+    args = parser.parse_args()
+
+    client = clients.get_qdrant_client()
+    if not args.dry_run:
+        vector_store.ensure_collection(vector_store.SHARED_COLLECTION, shared=True)
+
+    for group_id, group_name in list_groups():
+        if group_name == vector_store.SHARED_COLLECTION or not client.collection_exists(
+            group_name
+        ):
+            continue
+        copied = migrate_group(group_id, group_name, args.batch_size, args.dry_run)
+        print(f"[Migrate] {group_name} (group_id={group_id}): {copied} points")
+        if args.delete_source and not args.dry_run:
+            client.delete_collection(group_name)
+            print(f"[Migrate] Deleted source collection: {group_name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+기존 Qdrant 컬렉션에 config.yaml 의 qdrant.collection 설정(양자화, on-disk, HNSW)을 적용합니다.
+
+Qdrant 는 컬렉션 설정 변경 시 세그먼트를 백그라운드에서 다시 최적화하므로
+데이터를 복사하지 않고도 새 설정으로 인덱스가 재구성됩니다.
+
+사용 예:
+    python -m core.tools.rebuild_collections            # 모든 컬렉션
+    python -m core.tools.rebuild_collections my_group   # 지정한 컬렉션만
+"""
+import argparse
+import time
+
+from core.services import clients, vector_store
+
+
+def rebuild_collection(collection_name: str, settings: dict):
+    from qdrant_client import models
+
+    quantization_config = vector_store.build_quantization_config(settings)
+    clients.get_qdrant_client().update_collection(
+        collection_name=collection_name,
+        vectors_config={"": models.VectorParamsDiff(on_disk=settings.get("on_disk", False))},
+        hnsw_config=vector_store.build_hnsw_config(settings),
+        quantization_config=(
+            quantization_config
+            if quantization_config is not None
+            else models.Disabled.DISABLED
+        ),
+    )
+
+
+def wait_until_green(collection_name: str, timeout: float):
+    """최적화가 끝나 컬렉션 상태가 green 이 될 때까지 기다립니다."""
+    from qdrant_client import models
+
+    client = clients.get_qdrant_client()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = client.get_collection(collection_name)
+        if info.status == models.CollectionStatus.GREEN:
+            return True
+        time.sleep(1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Apply qdrant.collection settings from config.yaml to existing collections."
+    )
+    parser.add_argument("collections", nargs="*", help="대상 컬렉션 (기본: 전체)")
+    parser.add_argument(
+        "--no-wait", action="store_true", help="최적화 완료를 기다리지 않습니다."
+    )
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    client = clients.get_qdrant_client()
+    names = args.collections or [c.name for c in client.get_collections().collections]
+    settings = vector_store.COLLECTION_SETTINGS
+
+    for name in names:
+        rebuild_collection(name, settings)
+        print(f"[Rebuild] Updated settings for collection: {name}")
+        if not args.no_wait:
+            if wait_until_green(name, args.timeout):
+                print(f"[Rebuild] ✅ {name} is optimized")
+            else:
+                print(f"[Rebuild] ❌ Timed out waiting for {name} to finish optimizing")
+
+
+if __name__ == "__main__":
+    main()
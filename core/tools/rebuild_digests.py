@@ -0,0 +1,44 @@
+"""
+기존 요약들로 그룹 개요(digest) 트리를 처음부터 만듭니다.
+
+digest 도입 이전에 처리된 문서가 있는 그룹에 한 번 실행하세요.
+첫 번째 요약부터 다시 계산하므로 모든 잎 노드와 상위 노드가 채워집니다.
+
+사용 예:
+    python -m core.tools.rebuild_digests            # 모든 그룹
+    python -m core.tools.rebuild_digests my_group   # 지정한 그룹만
+"""
+import argparse
+
+from core.db import get_db
+from core.services import digest_updater
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build group digests from summaries.")
+    parser.add_argument("groups", nargs="*", help="대상 그룹 이름 (기본: 전체)")
+    args = parser.parse_args()
+
+    db_gen = get_db()
+    conn = next(db_gen)
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT DISTINCT ON (g.id) g.id, g.group_name, s.file_name
+            FROM project_groups g JOIN summaries s ON s.group_id = g.id
+            ORDER BY g.id, s.id
+            """
+        )
+        for group_id, group_name, first_file_name in cur.fetchall():
+            if args.groups and group_name not in args.groups:
+                continue
+            digest_updater.update_digest_for_summary(conn, group_id, first_file_name)
+            print(f"[Digest] ✅ {group_name}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,8 @@ CREATE TABLE IF NOT EXISTS summaries (
     file_name VARCHAR(255) NOT NULL,
     summary TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE,
+    UNIQUE (group_id, file_name)
 );
 
 CREATE TABLE IF NOT EXISTS mindmaps (
@@ -27,4 +28,67 @@ CREATE TABLE IF NOT EXISTS mindmaps (
     mindmap_data JSON NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS document_stages (
+    document_id INTEGER NOT NULL,
+    stage VARCHAR(32) NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (document_id, stage),
+    FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS mindmap_pending (
+    group_id INTEGER NOT NULL,
+    file_name VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (group_id, file_name),
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS mindmap_jobs (
+    group_id INTEGER PRIMARY KEY,
+    scheduled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS group_digest_nodes (
+    group_id INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    leaf_count INTEGER NOT NULL,
+    fingerprint VARCHAR(64) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (group_id, level, position),
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    id VARCHAR(32) PRIMARY KEY,
+    group_id INTEGER NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id SERIAL PRIMARY KEY,
+    session_id VARCHAR(32) NOT NULL,
+    role VARCHAR(16) NOT NULL,
+    content TEXT NOT NULL,
+    compacted BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE
+);
+
+-- 세션 안에서 재작성된 검색 질의별로 검색한 청크 ID (임베딩/검색 호출 생략용)
+CREATE TABLE IF NOT EXISTS chat_retrievals (
+    session_id VARCHAR(32) NOT NULL,
+    query_hash VARCHAR(64) NOT NULL,
+    point_ids JSON NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, query_hash),
+    FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE
 );
\ No newline at end of file
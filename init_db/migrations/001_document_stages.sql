@@ -0,0 +1,20 @@
+-- 기존 데이터베이스용 마이그레이션: 문서 처리 단계 체크포인트와 요약 중복 방지
+-- psql -U dongwon -d autobrief_db -f init_db/migrations/001_document_stages.sql
+
+CREATE TABLE IF NOT EXISTS document_stages (
+    document_id INTEGER NOT NULL,
+    stage VARCHAR(32) NOT NULL,
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (document_id, stage),
+    FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+);
+
+-- 중복 저장된 요약은 가장 최근 것만 남깁니다.
+DELETE FROM summaries s
+USING summaries newer
+WHERE s.group_id = newer.group_id
+  AND s.file_name = newer.file_name
+  AND s.id < newer.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS summaries_group_id_file_name_key
+    ON summaries (group_id, file_name);
@@ -0,0 +1,16 @@
+-- 기존 데이터베이스용 마이그레이션: 그룹 마인드맵 갱신 대기 목록과 예약 작업
+-- psql -U dongwon -d autobrief_db -f init_db/migrations/002_mindmap_coalescing.sql
+
+CREATE TABLE IF NOT EXISTS mindmap_pending (
+    group_id INTEGER NOT NULL,
+    file_name VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (group_id, file_name),
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS mindmap_jobs (
+    group_id INTEGER PRIMARY KEY,
+    scheduled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
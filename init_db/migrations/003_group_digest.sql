@@ -0,0 +1,14 @@
+-- 기존 데이터베이스용 마이그레이션: 그룹 개요(digest) 트리
+-- psql -U dongwon -d autobrief_db -f init_db/migrations/003_group_digest.sql
+
+CREATE TABLE IF NOT EXISTS group_digest_nodes (
+    group_id INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    leaf_count INTEGER NOT NULL,
+    fingerprint VARCHAR(64) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (group_id, level, position),
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
@@ -0,0 +1,31 @@
+-- 기존 데이터베이스용 마이그레이션: 서버 측 채팅 세션
+-- psql -U dongwon -d autobrief_db -f init_db/migrations/004_chat_sessions.sql
+
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    id VARCHAR(32) PRIMARY KEY,
+    group_id INTEGER NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (group_id) REFERENCES project_groups(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id SERIAL PRIMARY KEY,
+    session_id VARCHAR(32) NOT NULL,
+    role VARCHAR(16) NOT NULL,
+    content TEXT NOT NULL,
+    compacted BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE
+);
+
+-- 세션 안에서 재작성된 검색 질의별로 검색한 청크 ID (임베딩/검색 호출 생략용)
+CREATE TABLE IF NOT EXISTS chat_retrievals (
+    session_id VARCHAR(32) NOT NULL,
+    query_hash VARCHAR(64) NOT NULL,
+    point_ids JSON NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, query_hash),
+    FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE
+);
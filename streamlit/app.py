@@ -93,11 +93,32 @@ def get_summaries(group_name):
         return []  # 요약이 없는 것은 정상이므로 오류 메시지 없이 빈 리스트 반환
 
 
-def post_chat(group_name, query):
+def get_digest(group_name):
+    """그룹 전체 개요를 가져옵니다. 아직 생성되지 않았다면 None 을 반환합니다."""
+    try:
+        response = requests.get(f"{BACKEND_URL}/{group_name}/digest")
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException:
+        return None
+
+
+def create_chat_session(group_name):
+    """서버에 대화 기록을 저장하는 채팅 세션을 생성합니다. 실패하면 None 을 반환합니다."""
+    try:
+        response = requests.post(f"{BACKEND_URL}/{group_name}/chat/sessions")
+        response.raise_for_status()
+        return response.json().get("session_id")
+    except requests.exceptions.RequestException:
+        return None  # 세션 없이도 단발성 질문은 가능하므로 오류 메시지 없이 진행
+
+
+def post_chat(group_name, query, session_id=None):
     """채팅 메시지를 보내고 답변을 받습니다."""
     try:
         response = requests.post(
-            f"{BACKEND_URL}/{group_name}/chat", json={"query": query}
+            f"{BACKEND_URL}/{group_name}/chat",
+            json={"query": query, "session_id": session_id},
         )
         response.raise_for_status()
         return response.json()
@@ -192,6 +213,7 @@ if selected_group:
         ):
             st.session_state.messages = []
             st.session_state.current_group = group_name
+            st.session_state.chat_session_id = create_chat_session(group_name)
 
         for message in st.session_state.messages:
             with st.chat_message(message["role"]):
@@ -204,7 +226,9 @@ if selected_group:
 
             with st.chat_message("assistant"):
                 with st.spinner("답변을 생각하는 중..."):
-                    response = post_chat(group_name, prompt)
+                    response = post_chat(
+                        group_name, prompt, st.session_state.get("chat_session_id")
+                    )
                     if response:
                         answer = response.get(
                             "answer", "죄송합니다, 답변을 생성할 수 없습니다."
@@ -215,7 +239,10 @@ if selected_group:
                             full_response += "\n\n--- \n**참고 자료:**\n"
                             for i, source in enumerate(sources):
                                 content = source.get("content", "")
-                                full_response += f"- {content[:100]}...\n"
+                                origin = source.get("source", "Unknown")
+                                if source.get("page"):
+                                    origin += f" p.{source['page']}"
+                                full_response += f"- `{origin}` {content[:100]}...\n"
                         st.markdown(full_response)
                         st.session_state.messages.append(
                             {"role": "assistant", "content": full_response}
@@ -223,6 +250,14 @@ if selected_group:
 
     with summary_tab:
         st.header(f"`{group_name}` 그룹의 문서 요약")
+        if st.button("그룹 개요 불러오기"):
+            digest = get_digest(group_name)
+            if digest:
+                st.caption(f"문서 {digest['document_count']}개 기준")
+                st.write(digest["digest"])
+            else:
+                st.info("아직 그룹 개요가 없습니다. 문서 처리가 완료될 때까지 기다려주세요.")
+        st.divider()
         if st.button("요약 불러오기"):
             summaries = get_summaries(group_name)
             if summaries:
@@ -0,0 +1,245 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document
+
+from core.services import chat_session
+from core.services.llm_scheduler import estimate_tokens
+
+SESSION_ID = "s1"
+
+
+class FakeSessionStore:
+    """crud_chat_session 함수들을 대신하는 메모리 저장소."""
+
+    def __init__(self):
+        self.summary = ""
+        self.messages = []  # [id, role, content, compacted]
+        self.retrievals = {}
+        self.events = []
+
+    def add(self, role, content):
+        self.messages.append([len(self.messages) + 1, role, content, False])
+
+    def lock_session(self, conn, namespace, session_id):
+        self.events.append(("lock", namespace, session_id))
+
+    def get_session(self, conn, session_id):
+        self.events.append(("read",))
+        return (session_id, 1, self.summary)
+
+    def get_active_messages(self, conn, session_id):
+        return [(i, role, content) for i, role, content, compacted in self.messages if not compacted]
+
+    def compact_messages(self, conn, session_id, summary, message_ids):
+        self.events.append(("compact", list(message_ids)))
+        self.summary = summary
+        for message in self.messages:
+            if message[0] in message_ids:
+                message[3] = True
+
+    def get_cached_retrieval(self, conn, session_id, query_hash, ttl_seconds):
+        return self.retrievals.get((session_id, query_hash))
+
+    def save_retrieval(self, conn, session_id, query_hash, point_ids):
+        self.retrievals[(session_id, query_hash)] = point_ids
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeSessionStore()
+    for name in (
+        "lock_session",
+        "get_session",
+        "get_active_messages",
+        "compact_messages",
+        "get_cached_retrieval",
+        "save_retrieval",
+    ):
+        monkeypatch.setattr(chat_session.crud_chat_session, name, getattr(store, name))
+    return store
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    calls = []
+
+    def fake_invoke_llm(messages, model, priority=None, **kwargs):
+        calls.append(messages)
+        return FakeResponse(f"summary #{len(calls)}")
+
+    monkeypatch.setattr(chat_session.clients, "invoke_llm", fake_invoke_llm)
+    return calls
+
+
+def test_load_history_keeps_newest_messages_within_budget(store, monkeypatch):
+    monkeypatch.setattr(chat_session, "HISTORY_TOKEN_BUDGET", 100)
+    store.summary = "s" * 80  # 21 토큰
+    for i in range(10):
+        store.add("user" if i % 2 == 0 else "assistant", f"{i}" * 100)  # 26 토큰씩
+
+    summary, recent = chat_session.load_history(None, SESSION_ID)
+
+    assert summary == store.summary
+    # 100 - 21 토큰 예산에는 최근 메시지 3개(78 토큰)만 들어갑니다.
+    assert recent == [("assistant", "7" * 100), ("user", "8" * 100), ("assistant", "9" * 100)]
+    used = estimate_tokens(summary) + sum(estimate_tokens(content) for _, content in recent)
+    assert used <= 100
+
+
+def test_load_history_skips_compacted_messages(store):
+    store.add("user", "old question")
+    store.add("assistant", "old answer")
+    store.add("user", "new question")
+    store.messages[0][3] = store.messages[1][3] = True
+
+    assert chat_session.load_history(None, SESSION_ID)[1] == [("user", "new question")]
+
+
+def test_build_context_always_includes_chunk_text():
+    documents = [
+        Document(page_content="first chunk", metadata={"_id": "a"}),
+        Document(page_content="second chunk", metadata={"_id": "b"}),
+    ]
+    # 같은 청크가 다음 턴에 다시 검색되어도 원문이 그대로 들어갑니다.
+    for _ in range(2):
+        context = chat_session.build_context(documents)
+        assert context == "first chunk\n\n---\n\nsecond chunk"
+
+
+def compact(monkeypatch):
+    conn = FakeConnection()
+
+    def fake_get_db():
+        yield conn
+
+    monkeypatch.setattr(chat_session, "get_db", fake_get_db)
+    chat_session.compact_session(SESSION_ID)
+    return conn
+
+
+def test_compact_session_summarizes_old_messages(store, llm, monkeypatch):
+    monkeypatch.setattr(chat_session, "HISTORY_TOKEN_BUDGET", 50)
+    monkeypatch.setattr(chat_session, "KEEP_RECENT_MESSAGES", 2)
+    store.summary = "earlier summary"
+    for i in range(6):
+        store.add("user" if i % 2 == 0 else "assistant", f"message {i} " * 5)
+
+    conn = compact(monkeypatch)
+
+    assert len(llm) == 1
+    prompt = llm[0][1]["content"]
+    assert "earlier summary" in prompt
+    assert "message 3" in prompt and "message 4" not in prompt
+    assert store.summary == "summary #1"
+    assert [m[0] for m in store.messages if not m[3]] == [5, 6]
+    # 세션 잠금을 먼저 잡은 뒤 요약과 메시지를 읽습니다.
+    assert store.events[0] == ("lock", chat_session.CHAT_LOCK_NAMESPACE, SESSION_ID)
+    assert store.events[1] == ("read",)
+    assert store.events[-1] == ("compact", [1, 2, 3, 4])
+    assert conn.closed
+
+
+def test_compact_session_within_budget_is_noop(store, llm, monkeypatch):
+    monkeypatch.setattr(chat_session, "HISTORY_TOKEN_BUDGET", 2000)
+    store.add("user", "hello")
+    store.add("assistant", "hi")
+
+    conn = compact(monkeypatch)
+
+    assert llm == []
+    assert store.summary == ""
+    assert not any(event[0] == "compact" for event in store.events)
+    assert conn.closed
+
+
+class FakePoint:
+    def __init__(self, point_id, text):
+        self.id = point_id
+        self.payload = {"page_content": text, "metadata": {"source": "a.pdf"}}
+
+
+class FakeQdrant:
+    def __init__(self, points):
+        self.points = points
+        self.calls = 0
+
+    def retrieve(self, collection_name, ids, with_payload):
+        self.calls += 1
+        # 실제 Qdrant 처럼 요청한 순서를 보장하지 않습니다.
+        return [self.points[i] for i in reversed(ids) if i in self.points]
+
+
+class FakeRetriever:
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def invoke(self, query):
+        self.queries.append(query)
+        return list(self.documents)
+
+
+@pytest.fixture
+def search(monkeypatch):
+    documents = [
+        Document(page_content="alpha", metadata={"_id": "p1"}),
+        Document(page_content="beta", metadata={"_id": "p2"}),
+    ]
+    retriever = FakeRetriever(documents)
+    qdrant = FakeQdrant({"p1": FakePoint("p1", "alpha"), "p2": FakePoint("p2", "beta")})
+    monkeypatch.setattr(chat_session.vector_store, "get_retriever", lambda *args: retriever)
+    monkeypatch.setattr(chat_session.vector_store, "collection_name_for", lambda name: name)
+    monkeypatch.setattr(chat_session.clients, "get_qdrant_client", lambda: qdrant)
+    return retriever, qdrant
+
+
+def test_retrieve_reuses_cached_chunks_for_same_query(store, search):
+    retriever, qdrant = search
+
+    first = chat_session.retrieve(None, SESSION_ID, 1, "group", "What is Alpha?")
+    second = chat_session.retrieve(None, SESSION_ID, 1, "group", "  what is   alpha? ")
+
+    assert retriever.queries == ["What is Alpha?"]
+    assert qdrant.calls == 1
+    assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
+    assert chat_session.build_context(second) == "alpha\n\n---\n\nbeta"
+
+
+def test_retrieve_searches_again_when_cached_point_is_gone(store, search):
+    retriever, qdrant = search
+
+    chat_session.retrieve(None, SESSION_ID, 1, "group", "alpha")
+    del qdrant.points["p2"]
+    chat_session.retrieve(None, SESSION_ID, 1, "group", "alpha")
+
+    assert retriever.queries == ["alpha", "alpha"]
+
+
+def test_retrieve_without_session_skips_cache(store, search):
+    retriever, _ = search
+
+    chat_session.retrieve(None, None, 1, "group", "alpha")
+    chat_session.retrieve(None, None, 1, "group", "alpha")
+
+    assert retriever.queries == ["alpha", "alpha"]
+    assert store.retrievals == {}
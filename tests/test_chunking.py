@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+pytest.importorskip("langchain_text_splitters")
+
+from core.services.chunking import iter_chunks, make_splitter
+
+
+class FakeElement:
+    def __init__(self, text, page=None):
+        self.page_content = text
+        self.metadata = {"page_number": page}
+
+
+def chunk_texts(texts, chunk_size, chunk_overlap, window_size):
+    elements = [FakeElement(text, i) for i, text in enumerate(texts)]
+    splitter = make_splitter(chunk_size, chunk_overlap)
+    return [chunk for chunk, _ in iter_chunks(elements, splitter, window_size)]
+
+
+def whole_split(texts, chunk_size, chunk_overlap):
+    return make_splitter(chunk_size, chunk_overlap).split_text("\n\n".join(texts))
+
+
+def random_text(rng, length, alphabet="ab cd\n"):
+    return "".join(rng.choice(alphabet) for _ in range(length)).strip() or "x"
+
+
+def test_cut_on_segment_joiner():
+    # 창 경계가 요소 사이의 "\n\n" 에 걸리고, 겹침 청크가 창을 넘어가는 경우
+    texts = ["a" * 30, "b" * 30, "c" * 30, "d" * 30, "e" * 30]
+    expected = whole_split(texts, 70, 35)
+    assert chunk_texts(texts, 70, 35, window_size=64) == expected
+
+
+def test_element_longer_than_window():
+    rng = random.Random(0)
+    texts = ["intro", random_text(rng, 900), "middle", random_text(rng, 450), "end"]
+    expected = whole_split(texts, 100, 20)
+    assert chunk_texts(texts, 100, 20, window_size=150) == expected
+
+
+def test_blank_paragraphs_and_repeated_text():
+    texts = ["ab\n\n \n\nab", "ab ab", "x" * 40, "ab\n\n\n\nab", "ab"] * 10
+    for window_size in (51, 120, 400):
+        expected = whole_split(texts, 50, 10)
+        assert chunk_texts(texts, 50, 10, window_size) == expected
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_whole_document_split(seed):
+    rng = random.Random(seed)
+    chunk_size = rng.choice([50, 100, 200])
+    chunk_overlap = rng.choice([0, 10, chunk_size // 4])
+    window_size = rng.choice([chunk_size + 1, 150, 300, 1000])
+    texts = [
+        random_text(rng, rng.choice([1, 20, 49, 50, 51, 99, 150, 400]), "ab \n\n\n")
+        for _ in range(rng.randint(1, 40))
+    ]
+    expected = whole_split(texts, chunk_size, chunk_overlap)
+    assert chunk_texts(texts, chunk_size, chunk_overlap, window_size) == expected
+
+
+def test_pages_follow_chunk_start():
+    texts = ["a" * 40, "b" * 40, "c" * 40, "d" * 40]
+    elements = [FakeElement(text, page) for page, text in enumerate(texts, start=1)]
+    chunks = list(iter_chunks(elements, make_splitter(50, 0), window_size=60))
+    assert chunks == [(text, page) for page, text in enumerate(texts, start=1)]
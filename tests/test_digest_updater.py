@@ -0,0 +1,168 @@
+import random
+
+import pytest
+
+from core.services import digest_updater
+
+GROUP_ID = 1
+
+
+class FakeDigestDB:
+    """update_digest_for_summary 가 실행하는 쿼리만 해석하는 메모리 DB."""
+
+    def __init__(self):
+        self.summaries = []  # (id, file_name, summary)
+        self.nodes = {}  # (level, position) -> (content, leaf_count, fingerprint)
+
+    def add_summary(self, summary_id, file_name, text):
+        self.summaries.append((summary_id, file_name, text))
+        self.summaries.sort()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def root(self):
+        top = max(level for level, _ in self.nodes)
+        assert [pos for level, pos in self.nodes if level == top] == [0]
+        return self.nodes[(top, 0)][0], top
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params):
+        sql = " ".join(sql.split())
+        db = self.db
+        if sql.startswith("SELECT pg_advisory_xact_lock"):
+            self.result = [(None,)]
+        elif sql.startswith("SELECT id FROM summaries"):
+            _, file_name = params
+            self.result = [(i,) for i, name, _ in db.summaries if name == file_name]
+        elif sql.startswith("SELECT COUNT(*) FROM summaries WHERE group_id = %s AND id < %s"):
+            self.result = [(sum(1 for i, _, _ in db.summaries if i < params[1]),)]
+        elif sql.startswith("SELECT COUNT(*) FROM summaries"):
+            self.result = [(len(db.summaries),)]
+        elif sql.startswith("SELECT file_name, summary FROM summaries"):
+            self.result = [(name, text) for _, name, text in db.summaries[params[1] :]]
+        elif sql.startswith("SELECT fingerprint FROM group_digest_nodes"):
+            _, level, position = params
+            node = db.nodes.get((level, position))
+            self.result = [(node[2],)] if node else []
+        elif sql.startswith("INSERT INTO group_digest_nodes"):
+            _, level, position, content, leaf_count, fingerprint = params
+            db.nodes[(level, position)] = (content, leaf_count, fingerprint)
+        elif sql.startswith("SELECT content, leaf_count FROM group_digest_nodes"):
+            _, level, low, high = params
+            self.result = [
+                db.nodes[key][:2]
+                for key in sorted(db.nodes)
+                if key[0] == level and low <= key[1] < high
+            ]
+        elif sql.startswith("DELETE FROM group_digest_nodes"):
+            db.nodes = {key: node for key, node in db.nodes.items() if key[0] <= params[1]}
+        else:
+            raise AssertionError(f"unexpected query: {sql}")
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return list(self.result)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def merges(monkeypatch):
+    calls = []
+
+    def fake_merge(texts):
+        calls.append(list(texts))
+        return "(" + " | ".join(texts) + ")"
+
+    monkeypatch.setattr(digest_updater, "_merge", fake_merge)
+    monkeypatch.setattr(digest_updater, "FANOUT", 3)
+    return calls
+
+
+def expected_root(summaries):
+    """모든 요약으로 트리를 처음부터 다시 만든 루트 내용과 높이를 반환합니다."""
+    nodes = [f"[{name}]\n{text}" for _, name, text in sorted(summaries)]
+    level = 0
+    while level == 0 or len(nodes) > 1:
+        nodes = [
+            group[0] if len(group) == 1 else "(" + " | ".join(group) + ")"
+            for group in (nodes[i : i + 3] for i in range(0, len(nodes), 3))
+        ]
+        level += 1
+    return nodes[0], level
+
+
+def insert(db, summary_id):
+    file_name = f"doc{summary_id}.pdf"
+    db.add_summary(summary_id, file_name, f"summary {summary_id}")
+    digest_updater.update_digest_for_summary(db, GROUP_ID, file_name)
+
+
+def test_root_grows_past_fanout(merges):
+    db = FakeDigestDB()
+    for summary_id in range(1, 11):
+        insert(db, summary_id)
+        assert db.root() == expected_root(db.summaries)
+
+    # 10개 요약, fanout 3: level 1 에 4개, level 2 에 2개, level 3 의 루트
+    assert db.root()[1] == 3
+    assert db.nodes[(3, 0)][1] == 10
+
+
+def test_append_only_recomputes_one_branch(merges):
+    db = FakeDigestDB()
+    for summary_id in range(1, 10):
+        insert(db, summary_id)
+
+    merges.clear()
+    insert(db, 10)
+    # 새 잎은 level 1, 2 에서 혼자인 노드라 LLM 없이 올라가고, 새로 생긴 level 3 루트만 통합합니다.
+    assert len(merges) == 1
+    assert db.root() == expected_root(db.summaries)
+
+
+def test_out_of_order_commits(merges):
+    db = FakeDigestDB()
+    order = list(range(1, 15))
+    random.Random(7).shuffle(order)
+    for summary_id in order:
+        insert(db, summary_id)
+        assert db.root() == expected_root(db.summaries)
+
+
+def test_unchanged_summary_skips_llm(merges):
+    db = FakeDigestDB()
+    for summary_id in range(1, 8):
+        insert(db, summary_id)
+
+    merges.clear()
+    digest_updater.update_digest_for_summary(db, GROUP_ID, "doc4.pdf")
+    assert merges == []
+
+    db.summaries[3] = (4, "doc4.pdf", "revised summary 4")
+    digest_updater.update_digest_for_summary(db, GROUP_ID, "doc4.pdf")
+    # doc4 가 속한 level 1 노드와 루트만 다시 통합합니다.
+    assert len(merges) == 2
+    assert db.root() == expected_root(db.summaries)
+
+
+def test_missing_summary_is_noop(merges):
+    db = FakeDigestDB()
+    digest_updater.update_digest_for_summary(db, GROUP_ID, "missing.pdf")
+    assert db.nodes == {}
+    assert merges == []
@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+
+import pytest
+
+from core.services.llm_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    LLMScheduler,
+    ModelLimiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(status_code, headers)
+
+
+def failing(errors, result="ok"):
+    """errors 를 차례로 발생시킨 뒤 result 를 반환하는 fn 을 만듭니다."""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    fn.calls = calls
+    return fn
+
+
+def make_scheduler(clock, **overrides):
+    scheduler_config = {
+        "max_retries": 3,
+        "base_delay": 1.0,
+        "max_delay": 60.0,
+        "worker_share": 0.5,
+        "models": {"m": {"rpm": 6000, "tpm": 10_000_000, "max_concurrency": 8}},
+    }
+    scheduler_config.update(overrides)
+    return LLMScheduler(scheduler_config, role="api", clock=clock, sleep=clock.sleep)
+
+
+def test_retry_after_is_honoured_and_pauses_model():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    fn = failing([FakeAPIError(429, {"retry-after": "3"})])
+
+    assert scheduler.run("m", fn) == "ok"
+    assert clock.sleeps == [3.0]
+    assert len(fn.calls) == 2
+    assert scheduler.limiter("m").paused_until == pytest.approx(1003.0)
+
+
+def test_retry_after_ms_takes_precedence():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    fn = failing([FakeAPIError(429, {"retry-after-ms": "250", "retry-after": "9"})])
+
+    scheduler.run("m", fn)
+    assert clock.sleeps == [0.25]
+
+
+def test_rate_limit_halves_concurrency_and_successes_recover_it():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    limiter = scheduler.limiter("m")
+
+    scheduler.run("m", failing([FakeAPIError(429), FakeAPIError(429)]))
+    # 8 -> 4 -> 2, 이후 한 번의 성공으로는 아직 늘어나지 않습니다.
+    assert limiter.concurrency == 2
+
+    scheduler.run("m", failing([]))
+    assert limiter.concurrency == 3  # 현재 동시성(2)만큼 연속 성공하면 1 증가
+
+    for _ in range(3):
+        scheduler.run("m", failing([]))
+    assert limiter.concurrency == 4
+
+
+def test_concurrency_never_drops_below_minimum():
+    limiter = ModelLimiter(rpm=6000, tpm=10_000_000, max_concurrency=2, min_concurrency=1)
+    for _ in range(5):
+        limiter.acquire(BACKGROUND, 1, 1)
+        limiter.release(rate_limited=True)
+    assert limiter.concurrency == 1
+
+
+def test_backoff_uses_jitter_bounded_by_exponential_delay():
+    random.seed(0)
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    fn = failing([FakeAPIError(503), FakeAPIError(503), FakeAPIError(503)])
+
+    assert scheduler.run("m", fn) == "ok"
+    assert len(clock.sleeps) == 3
+    for attempt, delay in enumerate(clock.sleeps):
+        assert 0 <= delay <= 2**attempt
+
+
+def test_non_retryable_error_is_raised_without_retry():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    fn = failing([FakeAPIError(400)])
+
+    with pytest.raises(FakeAPIError):
+        scheduler.run("m", fn)
+    assert clock.sleeps == []
+    assert len(fn.calls) == 1
+    assert scheduler.limiter("m").in_flight == 0
+
+
+def test_gives_up_after_max_retries():
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_retries=2)
+    fn = failing([FakeAPIError(429)] * 5)
+
+    with pytest.raises(FakeAPIError):
+        scheduler.run("m", fn)
+    assert len(fn.calls) == 3
+    assert len(clock.sleeps) == 2
+
+
+def test_interactive_calls_are_served_before_waiting_background_calls():
+    limiter = ModelLimiter(rpm=6000, tpm=10_000_000, max_concurrency=1)
+    limiter.acquire(BACKGROUND, 1, 1)  # 슬롯을 점유해 이후 호출을 대기시킵니다.
+
+    order = []
+
+    def worker(priority, name):
+        limiter.acquire(priority, 1, 1)
+        order.append(name)
+        limiter.release()
+
+    threads = [
+        threading.Thread(target=worker, args=(BACKGROUND, "background-1")),
+        threading.Thread(target=worker, args=(BACKGROUND, "background-2")),
+        threading.Thread(target=worker, args=(INTERACTIVE, "interactive")),
+    ]
+    for thread in threads:
+        thread.start()
+        # 도착 순서를 고정합니다.
+        deadline = time.monotonic() + 2
+        while len(limiter._waiting) < threads.index(thread) + 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+
+    limiter.release()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["interactive", "background-1", "background-2"]
+
+
+def test_limits_are_split_between_processes():
+    scheduler_config = {
+        "worker_share": 0.8,
+        "worker_processes": 2,
+        "api_processes": 1,
+        "models": {"m": {"rpm": 1000, "tpm": 100_000}},
+    }
+    worker = LLMScheduler(scheduler_config, role="worker").limiter("m")
+    api = LLMScheduler(scheduler_config, role="api").limiter("m")
+
+    assert worker.requests.capacity == pytest.approx(400)
+    assert worker.tokens.capacity == pytest.approx(40_000)
+    assert api.requests.capacity == pytest.approx(200)
+    # 두 워커와 API 서버의 합이 API 키 전체 한도를 넘지 않습니다.
+    assert 2 * worker.requests.capacity + api.requests.capacity == pytest.approx(1000)
@@ -0,0 +1,66 @@
+import pytest
+
+from core.services import vector_store
+
+
+class NotFound(Exception):
+    status_code = 404
+
+
+class FakeVectorStore:
+    def __init__(self, collections):
+        self.collections = collections
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        if "group" not in self.collections:
+            raise NotFound("collection not found")
+        return ids
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    collections = set()
+    created = []
+
+    def fake_ensure_collection(collection_name, shared=False):
+        if collection_name in vector_store._ensured_collections:
+            return
+        collections.add(collection_name)
+        created.append(collection_name)
+        vector_store._ensured_collections.add(collection_name)
+
+    monkeypatch.setattr(vector_store, "LAYOUT", "per_group")
+    monkeypatch.setattr(vector_store, "_ensured_collections", set())
+    monkeypatch.setattr(vector_store, "ensure_collection", fake_ensure_collection)
+    monkeypatch.setattr(
+        vector_store, "get_vector_store", lambda *args: FakeVectorStore(collections)
+    )
+    return collections, created
+
+
+def test_recreates_collection_deleted_by_another_process(qdrant):
+    collections, created = qdrant
+    vector_store.add_chunks("group", ["a"], [{}], ["1"], lambda: True)
+    collections.discard("group")
+
+    assert vector_store.add_chunks("group", ["b"], [{}], ["2"], lambda: True) == ["2"]
+    assert created == ["group", "group"]
+
+
+def test_does_not_recreate_collection_of_deleted_group(qdrant):
+    collections, created = qdrant
+    vector_store.add_chunks("group", ["a"], [{}], ["1"], lambda: True)
+    collections.discard("group")
+
+    with pytest.raises(ValueError):
+        vector_store.add_chunks("group", ["b"], [{}], ["2"], lambda: False)
+    assert created == ["group"]
+    assert "group" not in collections
+
+
+def test_does_not_create_collection_for_deleted_group(qdrant):
+    collections, created = qdrant
+
+    with pytest.raises(ValueError):
+        vector_store.add_chunks("group", ["a"], [{}], ["1"], lambda: False)
+    assert created == []